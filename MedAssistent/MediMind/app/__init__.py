@@ -2,7 +2,27 @@ import os
 import logging
 from flask import Flask, render_template
 from flask_cors import CORS
-from app.db.connection import init_db
+from app.db.connection import init_app as init_db_pool, get_pool
+from app.services import metrics, tokens, appointment_events
+
+def _register_gauges():
+    """Pool, chat worker, password hasher and event stream state, read at scrape time"""
+    from app.services.async_chat import get_chat_worker
+    from app.services.auth import get_password_hasher
+    for key in ('size', 'in_use', 'waiting'):
+        metrics.registry.register(metrics.Gauge(
+            f'medimind_db_pool_{key}', f'Connection pool {key.replace("_", " ")}',
+            lambda key=key: get_pool().stats()[key]))
+    for key in ('in_flight', 'waiting'):
+        metrics.registry.register(metrics.Gauge(
+            f'medimind_llm_{key}', f'LLM calls {key.replace("_", " ")}',
+            lambda key=key: get_chat_worker().stats()[key]))
+    metrics.registry.register(metrics.Gauge(
+        'medimind_auth_hash_in_flight', 'Password hashes queued or running',
+        lambda: get_password_hasher().stats()['in_flight']))
+    metrics.registry.register(metrics.Gauge(
+        'medimind_sse_subscribers', 'Open appointment event streams',
+        lambda: appointment_events.appointment_events.stats()['subscribers']))
 
 def create_app():
     app = Flask(__name__, static_folder='../static', template_folder='../static')
@@ -13,8 +33,21 @@ def create_app():
     # Enable CORS for all routes
     CORS(app, origins="*")
     
-    # Initialize database
-    init_db()
+    # Check the schema version (migrations run once per deploy) and set up
+    # pooled per-request connections
+    from app.db.migrate import ensure_schema
+    ensure_schema()
+    init_db_pool(app)
+
+    # Request latency / DB query metrics and the /metrics endpoint
+    metrics.init_app(app)
+    _register_gauges()
+
+    # Doctor access tokens, verified once per request
+    tokens.init_app(app)
+
+    # Appointment change events (LISTEN/NOTIFY -> caches and SSE streams)
+    appointment_events.init_app(app)
     
     # Register blueprints
     from app.routes.chatbot import chatbot_bp
@@ -33,6 +66,11 @@ def create_app():
     def index():
         return render_template('index.html')
     
+    @app.route('/api/health/db')
+    def db_pool_stats():
+        from app.db.chat_history_writer import get_history_writer
+        return {"pool": get_pool().stats(), "chat_history_writer": get_history_writer().stats()}
+    
     @app.errorhandler(404)
     def not_found(error):
         return {"error": "Not found"}, 404
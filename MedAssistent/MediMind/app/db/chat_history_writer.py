@@ -0,0 +1,150 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from psycopg2.extras import execute_values
+from app.db.connection import db_connection
+
+
+class ChatHistoryWriter:
+    """Writes chat_history rows off the request path in batches.
+
+    Rows are queued by request threads and flushed by a background thread
+    with one multi-row INSERT whenever batch_size rows are pending or
+    flush_interval seconds have passed. The queue is bounded: when it is
+    full, enqueue() blocks for up to put_timeout seconds and then drops the
+    row, counting it as a lost write.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=0.5, max_queue=10000, put_timeout=0.05, retries=2):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.batches = 0
+        self.lost = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='chat-history-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, session_id, user_message, bot_response):
+        """Queue a row; returns False if it had to be dropped"""
+        row = (session_id, user_message, bot_response, datetime.now())
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.lost += 1
+            logging.warning(f"Chat history queue full, dropped row for session {session_id}")
+            return False
+
+    def _collect(self):
+        """Block until a batch is ready: batch_size rows or flush_interval elapsed"""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                if batch or self._stop.is_set():
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _flush(self, batch):
+        for attempt in range(self.retries + 1):
+            try:
+                with db_connection() as conn:
+                    with conn.cursor() as cur:
+                        execute_values(cur, '''
+                            INSERT INTO chat_history (session_id, user_message, bot_response, created_at)
+                            VALUES %s
+                        ''', batch, page_size=len(batch))
+                    conn.commit()
+                with self._lock:
+                    self.written += len(batch)
+                    self.batches += 1
+                return
+            except Exception as e:
+                logging.error(f"Failed to flush {len(batch)} chat history rows (attempt {attempt + 1}): {e}")
+                if not self._stop.is_set():
+                    time.sleep(min(2 ** attempt * 0.1, 2.0))
+        with self._lock:
+            self.lost += len(batch)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def stop(self, timeout=10.0):
+        """Flush everything still queued and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            logging.warning(f"Chat history writer did not drain in time ({self._queue.qsize()} rows pending)")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "lost": self.lost,
+            }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_history_writer():
+    """Return the process-wide chat history writer, starting it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = ChatHistoryWriter(
+                    batch_size=int(os.environ.get('CHAT_HISTORY_BATCH_SIZE', 100)),
+                    flush_interval=float(os.environ.get('CHAT_HISTORY_FLUSH_INTERVAL', 0.5)),
+                    max_queue=int(os.environ.get('CHAT_HISTORY_MAX_QUEUE', 10000)),
+                )
+                writer.start()
+                atexit.register(writer.stop)
+                _writer = writer
+    return _writer
+
+
+def stop_history_writer(timeout=10.0):
+    """Flush and stop the process-wide writer, if it was ever started"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop(timeout)
@@ -1,96 +1,320 @@
 import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
 import psycopg2
+import psycopg2.pool
+import psycopg2.errorcodes
+import psycopg2.extensions
 from psycopg2.extras import RealDictCursor
-import logging
+from flask import g, has_app_context
+from app.services.metrics import record_query
 
-def get_db_connection():
-    """Get a connection to the PostgreSQL database"""
-    try:
-        conn = psycopg2.connect(
-            dbname='dhp2024',
-            user='postgres',
-            password='Ajay@123',
-            host='localhost',
-            port='5432'
-        )
+
+class PoolTimeoutError(psycopg2.pool.PoolError):
+    """Raised when no connection could be checked out before the timeout"""
+
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor that reports every statement's duration to the metrics module"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(time.perf_counter() - start, query, self)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(time.perf_counter() - start, query, self)
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool.
+
+    Unlike psycopg2's ThreadedConnectionPool, callers block (up to
+    checkout_timeout) when the pool is exhausted instead of failing
+    immediately, idle connections above minconn are closed after
+    idle_timeout seconds, and connections are health-checked on checkout.
+    """
+
+    def __init__(self, minconn, maxconn, idle_timeout=300.0, checkout_timeout=10.0,
+                 health_check_interval=30.0, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: minconn=%s maxconn=%s" % (minconn, maxconn))
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = []  # stack of (conn, last_used) so the warmest connection is reused first
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Checkout metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return psycopg2.connect(cursor_factory=InstrumentedCursor, **self._connect_kwargs)
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_idle_locked(self):
+        """Close connections idle for longer than idle_timeout, keeping minconn"""
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        keep = []
+        # Oldest connections sit at the bottom of the stack
+        for conn, last_used in self._idle:
+            if self._size > self.minconn and now - last_used > self.idle_timeout:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self, timeout=None):
+        """Check out a connection, blocking until one is available"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        conn = None
+        last_used = None
+
+        with self._cond:
+            if self._closed:
+                raise psycopg2.pool.PoolError("connection pool is closed")
+            self._waiting += 1
+            try:
+                while True:
+                    self._evict_idle_locked()
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            "Timed out after %.1fs waiting for a database connection" % timeout)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+
+        # Connect / health-check outside the lock so other threads aren't blocked on I/O
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                self._close_quietly(conn)
+                conn = None
+                with self._cond:
+                    self._reconnects += 1
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_time_total += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
         return conn
-    except psycopg2.Error as e:
-        logging.error(f"Database connection error: {e}")
-        raise
-
-
-def init_db():
-    """Initialize database tables"""
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            # Create doctors table
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS doctors (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    email VARCHAR(255) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    specialization VARCHAR(255) NOT NULL,
-                    license_number VARCHAR(100) UNIQUE NOT NULL,
-                    phone VARCHAR(20),
-                    bio TEXT,
-                    experience_years INTEGER DEFAULT 0,
-                    consultation_fee DECIMAL(10,2) DEFAULT 0.00,
-                    is_verified BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create doctor availability table
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS doctor_availability (
-                    id SERIAL PRIMARY KEY,
-                    doctor_id INTEGER REFERENCES doctors(id) ON DELETE CASCADE,
-                    day_of_week INTEGER NOT NULL CHECK (day_of_week >= 0 AND day_of_week <= 6),
-                    start_time TIME NOT NULL,
-                    end_time TIME NOT NULL,
-                    is_available BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create appointments table
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS appointments (
-                    id SERIAL PRIMARY KEY,
-                    patient_name VARCHAR(255) NOT NULL,
-                    patient_email VARCHAR(255) NOT NULL,
-                    patient_phone VARCHAR(20),
-                    doctor_id INTEGER REFERENCES doctors(id) ON DELETE CASCADE,
-                    appointment_date DATE NOT NULL,
-                    appointment_time TIME NOT NULL,
-                    reason TEXT,
-                    status VARCHAR(20) DEFAULT 'pending',
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create chat history table
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS chat_history (
-                    id SERIAL PRIMARY KEY,
-                    session_id VARCHAR(255),
-                    user_message TEXT NOT NULL,
-                    bot_response TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            logging.info("Database tables initialized successfully")
-            
-    except psycopg2.Error as e:
-        conn.rollback()
-        logging.error(f"Database initialization error: {e}")
-        raise
-    finally:
-        conn.close()
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool, discarding any open transaction"""
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        with self._cond:
+            self._in_use -= 1
+            if close or conn.closed or self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "checkout_ms_avg": (self._checkout_time_total / self._checkouts * 1000.0
+                                    if self._checkouts else 0.0),
+                "checkout_ms_max": self._checkout_time_max * 1000.0,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_closed_pid = None  # process that called close_pool(); it never reopens the pool
+
+
+def connection_params():
+    """psycopg2.connect() keyword arguments from the PG* environment variables"""
+    return dict(
+        dbname=os.environ.get('PGDATABASE', 'dhp2024'),
+        user=os.environ.get('PGUSER', 'postgres'),
+        password=os.environ.get('PGPASSWORD', 'Ajay@123'),
+        host=os.environ.get('PGHOST', 'localhost'),
+        port=os.environ.get('PGPORT', '5432'),
+    )
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use.
+
+    Raises PoolError once close_pool() has run in this process. A process
+    forked afterwards (a gunicorn worker after the master closed its
+    preload pool) gets a pool of its own.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if _closed_pid == os.getpid():
+                    raise psycopg2.pool.PoolError("connection pool is closed")
+                try:
+                    _pool = ConnectionPool(
+                        minconn=int(os.environ.get('DB_POOL_MIN', 1)),
+                        maxconn=int(os.environ.get('DB_POOL_MAX', 10)),
+                        idle_timeout=float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+                        checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', 10)),
+                        health_check_interval=float(os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+                        **connection_params()
+                    )
+                except psycopg2.Error as e:
+                    logging.error(f"Database connection error: {e}")
+                    raise
+    return _pool
+
+
+def close_pool():
+    """Close every idle connection and refuse further checkouts"""
+    global _pool, _closed_pid
+    with _pool_lock:
+        _closed_pid = os.getpid()
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+@contextmanager
+def db_connection():
+    """Check out a pooled connection for code running outside a request"""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def get_db_connection():
+    """Get the pooled connection bound to the current request.
+
+    The connection is checked out on first use and returned to the pool by
+    the teardown handler registered in init_app(), so callers must not
+    close it.
+    """
+    if not has_app_context():
+        raise RuntimeError("get_db_connection() requires an app context; use db_connection() instead")
+    if 'db_conn' not in g:
+        pool = get_pool()
+        g.db_conn = (pool, pool.getconn())
+    return g.db_conn[1]
+
+
+def _release_db_connection(exc=None):
+    # Return the connection to the pool it came from; if that pool has been
+    # closed since, putconn() closes the connection instead of reopening one
+    checkout = g.pop('db_conn', None)
+    if checkout is not None:
+        pool, conn = checkout
+        pool.putconn(conn)
+
+
+def unique_violation(error):
+    """Name of the unique constraint/index a statement violated, or None for any other error.
+
+    Lets writers insert straight away and turn a duplicate into a 409,
+    instead of checking with a SELECT first (an extra round trip that still
+    races with concurrent inserts).
+    """
+    if getattr(error, 'pgcode', None) != psycopg2.errorcodes.UNIQUE_VIOLATION:
+        return None
+    return error.diag.constraint_name
+
+
+def init_app(app):
+    """Register pool teardown with the Flask app"""
+    app.teardown_appcontext(_release_db_connection)
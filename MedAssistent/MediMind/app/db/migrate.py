@@ -0,0 +1,166 @@
+"""Versioned schema migrations.
+
+Migrations are the NNNN_name.sql files in app/db/migrations, applied in
+order and recorded in the schema_version table. Run them once per deploy:
+
+    python -m app.db.migrate            # apply pending migrations
+    python -m app.db.migrate status     # show applied/pending versions
+
+Workers only call ensure_schema() at startup, which costs one SELECT when
+the database is current. With DB_AUTO_MIGRATE=1 (the default, convenient
+for development) a worker that finds pending migrations applies them
+itself; with DB_AUTO_MIGRATE=0 it refuses to start until the deploy step
+has run.
+"""
+import os
+import re
+import sys
+import hashlib
+import logging
+
+from app.db.connection import db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
+# pg_advisory_xact_lock key serializing runners across processes and hosts
+MIGRATION_LOCK_ID = 7_310_201_701
+
+_FILENAME_RE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """[(version, name, sql, checksum)] sorted by version"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding='utf-8') as f:
+            sql = f.read()
+        migrations.append((int(match.group(1)), match.group(2), sql,
+                           hashlib.sha256(sql.encode('utf-8')).hexdigest()))
+    migrations.sort()
+    versions = [m[0] for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def current_version(conn):
+    """Highest applied version, or 0 for a database that was never migrated"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+        if not cur.fetchone()['present']:
+            return 0
+        cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+        return cur.fetchone()['version']
+
+
+def migrate(migrations=None):
+    """Apply pending migrations in one transaction; returns the versions applied.
+
+    The advisory lock makes concurrent runners (several workers or hosts
+    starting together) wait for the first one, then find nothing to do.
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    applied_now = []
+    with db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                cur.execute('''
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        checksum TEXT NOT NULL,
+                        applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+                    )
+                ''')
+                cur.execute("SELECT version, checksum FROM schema_version")
+                applied = {row['version']: row['checksum'] for row in cur.fetchall()}
+
+                for version, name, sql, checksum in migrations:
+                    if version in applied:
+                        if applied[version] != checksum:
+                            logging.warning(f"Migration {version:04d}_{name} changed after it was applied")
+                        continue
+                    logging.info(f"Applying migration {version:04d}_{name}")
+                    cur.execute(sql)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+                        (version, name, checksum)
+                    )
+                    applied_now.append(version)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Migration failed, no changes applied: {e}")
+            raise
+    if applied_now:
+        logging.info(f"Database migrated to version {applied_now[-1]}")
+    return applied_now
+
+
+def ensure_schema(auto_migrate=None):
+    """Startup check: one query when current, migrate or fail when behind"""
+    if auto_migrate is None:
+        auto_migrate = os.environ.get('DB_AUTO_MIGRATE', '1') == '1'
+    migrations = load_migrations()
+    latest = migrations[-1][0] if migrations else 0
+
+    with db_connection() as conn:
+        version = current_version(conn)
+        conn.rollback()
+    if version >= latest:
+        return version
+
+    if not auto_migrate:
+        raise SchemaOutOfDateError(
+            f"Database schema is at version {version}, code expects {latest}; "
+            f"run `python -m app.db.migrate` before starting workers"
+        )
+    migrate(migrations)
+    return latest
+
+
+def status():
+    migrations = load_migrations()
+    with db_connection() as conn:
+        version = current_version(conn)
+        applied = {}
+        if version:
+            with conn.cursor() as cur:
+                cur.execute("SELECT version, checksum, applied_at FROM schema_version")
+                applied = {row['version']: row for row in cur.fetchall()}
+        conn.rollback()
+    for number, name, _, checksum in migrations:
+        row = applied.get(number)
+        if row is None:
+            state = "pending"
+        elif row['checksum'] != checksum:
+            state = f"applied {row['applied_at']:%Y-%m-%d %H:%M} (file changed since)"
+        else:
+            state = f"applied {row['applied_at']:%Y-%m-%d %H:%M}"
+        print(f"{number:04d}_{name}: {state}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    if argv and argv[0] == 'status':
+        status()
+        return 0
+    if argv:
+        print("usage: python -m app.db.migrate [status]", file=sys.stderr)
+        return 2
+    applied = migrate()
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
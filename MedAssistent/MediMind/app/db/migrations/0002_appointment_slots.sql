@@ -0,0 +1,23 @@
+-- Appointments: reconcile with the definition appointments.py used to
+-- assume, prevent double booking, and index the listing order
+
+UPDATE appointments SET status = 'pending' WHERE status IS NULL;
+
+ALTER TABLE appointments
+    ALTER COLUMN status SET NOT NULL,
+    ALTER COLUMN patient_phone SET DEFAULT '',
+    ALTER COLUMN reason SET DEFAULT '',
+    ALTER COLUMN notes SET DEFAULT '';
+
+-- Prevent double-booking for active states
+CREATE UNIQUE INDEX IF NOT EXISTS uniq_active_slot
+    ON appointments(doctor_id, appointment_date, appointment_time)
+    WHERE status IN ('pending','confirmed');
+
+-- Keyset pagination in listing order, overall and per doctor/status
+CREATE INDEX IF NOT EXISTS idx_appointments_date_time
+    ON appointments(appointment_date DESC, appointment_time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date
+    ON appointments(doctor_id, appointment_date DESC, appointment_time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_appointments_status_date
+    ON appointments(status, appointment_date DESC, appointment_time DESC, id DESC);
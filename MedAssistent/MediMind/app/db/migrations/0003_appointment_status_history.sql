@@ -0,0 +1,15 @@
+-- Optimistic concurrency and audit trail for status transitions
+
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+CREATE TABLE IF NOT EXISTS appointment_status_history (
+    id BIGSERIAL PRIMARY KEY,
+    appointment_id INTEGER NOT NULL REFERENCES appointments(id) ON DELETE CASCADE,
+    from_status TEXT NOT NULL,
+    to_status TEXT NOT NULL,
+    notes TEXT DEFAULT '',
+    changed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_appointment_status_history_appointment
+    ON appointment_status_history(appointment_id, id);
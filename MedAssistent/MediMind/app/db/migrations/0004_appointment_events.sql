@@ -0,0 +1,29 @@
+-- NOTIFY appointment_events whenever an appointment is booked or its
+-- status/notes change. Notifications are sent on commit only, in commit
+-- order. The payload carries ids, slot and status but no patient data, so
+-- it can be pushed to dashboards as is.
+
+CREATE OR REPLACE FUNCTION notify_appointment_event() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('appointment_events', json_build_object(
+        'type', CASE
+                    WHEN TG_OP = 'INSERT' THEN 'booked'
+                    WHEN OLD.status IS DISTINCT FROM NEW.status THEN 'status_changed'
+                    ELSE 'updated'
+                END,
+        'id', NEW.id,
+        'doctor_id', NEW.doctor_id,
+        'appointment_date', NEW.appointment_date,
+        'appointment_time', to_char(NEW.appointment_time, 'HH24:MI'),
+        'status', NEW.status,
+        'from_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.status END,
+        'version', NEW.version
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS appointment_events ON appointments;
+CREATE TRIGGER appointment_events
+    AFTER INSERT OR UPDATE OF status, notes, version ON appointments
+    FOR EACH ROW EXECUTE FUNCTION notify_appointment_event();
@@ -0,0 +1,3 @@
+-- Chat context reads a session's most recent turns and its row count
+CREATE INDEX IF NOT EXISTS idx_chat_history_session
+    ON chat_history(session_id, created_at DESC, id DESC);
@@ -0,0 +1,57 @@
+import time
+import logging
+
+# When begin_shutdown() first ran (monotonic clock)
+_shutdown_requested_at = None
+
+
+def begin_shutdown():
+    """
+    Called as soon as the worker is asked to stop, before in-flight requests
+    are drained: note the time and end open event streams, which would
+    otherwise hold the drain for the whole graceful timeout. Must stay
+    signal-handler safe.
+    """
+    global _shutdown_requested_at
+    if _shutdown_requested_at is None:
+        _shutdown_requested_at = time.monotonic()
+    from app.services.appointment_events import appointment_events
+    appointment_events.close_subscribers()
+
+
+def remaining_grace(grace, margin=2.0):
+    """
+    Seconds left of a grace period that started at begin_shutdown(), less a
+    safety margin; the whole period if shutdown was never requested.
+    """
+    elapsed = 0.0 if _shutdown_requested_at is None else time.monotonic() - _shutdown_requested_at
+    return max(0.5, grace - elapsed - margin)
+
+
+def shutdown(timeout=30.0):
+    """
+    Drain in-flight work and release process resources, in dependency order:
+    LLM calls first (their replies still need to reach chat history), then
+    the chat history writer, then background refreshers, the appointment
+    event listener, the password hashing pool and the DB pool.
+    Safe to call more than once.
+    """
+    from app.services.async_chat import shutdown_chat_worker
+    from app.db.chat_history_writer import stop_history_writer
+    from app.services.news_store import news_store
+    from app.services.auth import shutdown_password_hasher
+    from app.services.appointment_events import appointment_events
+    from app.db.connection import close_pool
+
+    deadline = time.monotonic() + timeout
+
+    def remaining():
+        return max(0.5, deadline - time.monotonic())
+
+    shutdown_chat_worker(remaining() * 0.6)
+    stop_history_writer(remaining())
+    news_store.stop()
+    appointment_events.stop()
+    shutdown_password_hasher()
+    close_pool()
+    logging.info("Shutdown complete")
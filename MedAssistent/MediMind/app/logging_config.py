@@ -0,0 +1,50 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+# Chatty third-party loggers that only matter when debugging them
+QUIET_LOGGERS = ('urllib3', 'werkzeug', 'google', 'grpc', 'asyncio')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Configure the root logger from LOG_LEVEL (default INFO) and LOG_FORMAT
+    (text or json). Replaces any handlers installed earlier, so calling it
+    more than once is harmless.
+    """
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.environ.get('LOG_FORMAT', 'text')).lower()
+
+    handler = logging.StreamHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    quiet_level = logging.DEBUG if level == 'DEBUG' else logging.WARNING
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(quiet_level, root.level))
@@ -1,11 +1,24 @@
 # appointments.py
+import os
+import json
+import time
+import base64
 import logging
-from datetime import datetime, time as dtime, date as ddate
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta, time as dtime, date as ddate
+import hashlib
+from flask import Blueprint, Response, g, request, jsonify
 from psycopg2 import sql
 import psycopg2
 import psycopg2.extras
-from app.db.connection import get_db_connection  # uses your existing helper
+from app.db.connection import get_db_connection, unique_violation  # pooled per-request connection (dict rows)
+from app.services.slot_engine import slot_cache, free_slots, bitmap_times, slot_index, SLOT_MINUTES
+from app.services.tokens import doctor_required
+from app.services.agenda import agenda_store
+from app.services.appointment_events import appointment_events, EventsBusyError, RESYNC, CLOSE
+
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', 15))
+# Streams are closed after this long; EventSource reconnects by itself
+SSE_MAX_DURATION = float(os.environ.get('SSE_MAX_DURATION', 300))
 
 appointments_bp = Blueprint('appointments', __name__)
 
@@ -21,42 +34,6 @@ appointments_bp = Blueprint('appointments', __name__)
 #     )
 # ---------------------------------------------------------------------
 
-def _ensure_schema():
-    """
-    Creates the appointments table and indexes if they don't exist.
-    Enforces a partial unique index to prevent double booking of active slots.
-    """
-    conn = get_db_connection()
-    try:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS appointments (
-                    id SERIAL PRIMARY KEY,
-                    patient_name TEXT NOT NULL,
-                    patient_email TEXT NOT NULL,
-                    patient_phone TEXT DEFAULT '',
-                    doctor_id INTEGER NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
-                    appointment_date DATE NOT NULL,
-                    appointment_time TIME NOT NULL,
-                    reason TEXT DEFAULT '',
-                    status TEXT NOT NULL DEFAULT 'pending',  -- pending|confirmed|completed|cancelled
-                    notes TEXT DEFAULT '',
-                    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
-                    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
-                );
-            """)
-            # Prevent double-booking for active states
-            cur.execute("""
-                CREATE UNIQUE INDEX IF NOT EXISTS uniq_active_slot
-                ON appointments(doctor_id, appointment_date, appointment_time)
-                WHERE status IN ('pending','confirmed');
-            """)
-        conn.commit()
-    finally:
-        conn.close()
-
-_ensure_schema()
-
 def _parse_date(value: str) -> ddate:
     return datetime.strptime(value, "%Y-%m-%d").date()
 
@@ -73,92 +50,237 @@ def _trim(s: str, max_len: int = 500) -> str:
     s = s.strip()
     return s[:max_len]
 
+VALID_STATUSES = ('pending', 'confirmed', 'completed', 'cancelled')
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+# Upper bound on items per bulk request (one statement, one transaction)
+BULK_MAX_ITEMS = 5000
+
 # --------------------------- BOOK ------------------------------------
 
+def _validate_booking(data):
+    """
+    Validate and normalize one booking payload.
+    Returns ((patient_name, patient_email, patient_phone, doctor_id,
+    appointment_date, appointment_time, reason), None) or (None, error).
+    """
+    if not isinstance(data, dict):
+        return None, "Booking must be an object"
+
+    # Required fields
+    required = ['patient_name', 'patient_email', 'doctor_id', 'appointment_date', 'appointment_time']
+    missing = [f for f in required if not data.get(f)]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+
+    try:
+        doctor_id = int(data['doctor_id'])
+    except (TypeError, ValueError):
+        return None, "doctor_id must be an integer"
+
+    # Validate date & time
+    try:
+        appt_date = _parse_date(data['appointment_date'])
+        appt_time = _parse_time(data['appointment_time'])
+    except (TypeError, ValueError):
+        return None, "Invalid date or time format. Use YYYY-MM-DD and HH:MM"
+
+    appt_dt = datetime.combine(appt_date, appt_time)
+    if appt_dt <= _now():
+        return None, "Appointment must be scheduled in the future"
+
+    return (
+        _trim(data['patient_name'], 120),
+        _trim(data['patient_email'], 254),
+        _trim(data.get('patient_phone', ''), 30),
+        doctor_id,
+        appt_date,
+        appt_time,
+        _trim(data.get('reason', ''), 1000),
+    ), None
+
 @appointments_bp.route('/api/book', methods=['POST'])
 def book_appointment():
     """Book a new appointment with race-safe checks and DB unique index."""
     try:
         data = request.get_json(force=True) or {}
 
-        # Required fields
-        required = ['patient_name', 'patient_email', 'doctor_id', 'appointment_date', 'appointment_time']
-        missing = [f for f in required if not data.get(f)]
-        if missing:
-            return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
+        booking, error = _validate_booking(data)
+        if error:
+            return jsonify({"error": error}), 400
+        patient_name, patient_email, patient_phone, doctor_id, appt_date, appt_time, reason = booking
 
-        patient_name = _trim(data['patient_name'], 120)
-        patient_email = _trim(data['patient_email'], 254)
-        patient_phone = _trim(data.get('patient_phone', ''), 30)
-        reason = _trim(data.get('reason', ''), 1000)
+        conn = get_db_connection()
+        with conn.cursor() as cur:
+            # One statement: insert only if the doctor exists and is
+            # verified; uniq_active_slot rejects a taken slot
+            try:
+                cur.execute("""
+                    WITH d AS (
+                        SELECT id, name FROM doctors WHERE id = %s AND is_verified = TRUE
+                    ),
+                    ins AS (
+                        INSERT INTO appointments
+                            (patient_name, patient_email, patient_phone, doctor_id,
+                             appointment_date, appointment_time, reason, status)
+                        SELECT %s, %s, %s, d.id, %s, %s, %s, 'pending' FROM d
+                        RETURNING *
+                    )
+                    SELECT ins.*, d.name AS doctor_name FROM d LEFT JOIN ins ON TRUE;
+                """, (doctor_id, patient_name, patient_email, patient_phone,
+                      appt_date, appt_time, reason))
+                row = cur.fetchone()
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                slot_cache.invalidate(doctor_id, appt_date)
+                # Slot already taken by another request
+                if unique_violation(e) == 'uniq_active_slot':
+                    return jsonify({"error": "This time slot is already booked"}), 409
+                logging.exception("DB error inserting appointment")
+                return jsonify({"error": "Failed to book appointment"}), 500
+
+            if row is None:
+                return jsonify({"error": "Doctor not found or not verified"}), 404
+            appt_id = row['id']
+            slot_cache.invalidate(doctor_id, appt_date)
+            agenda_store.apply([row])
 
-        try:
-            doctor_id = int(data['doctor_id'])
-        except (TypeError, ValueError):
-            return jsonify({"error": "doctor_id must be an integer"}), 400
+            return jsonify({
+                "message": "Appointment booked successfully",
+                "appointment_id": appt_id,
+                "doctor_name": row['doctor_name'],
+                "appointment_date": appt_date.isoformat(),
+                "appointment_time": appt_time.strftime("%H:%M"),
+                "status": "pending"
+            }), 201
 
-        # Validate date & time
-        try:
-            appt_date = _parse_date(data['appointment_date'])
-            appt_time = _parse_time(data['appointment_time'])
-        except ValueError:
-            return jsonify({"error": "Invalid date or time format. Use YYYY-MM-DD and HH:MM"}), 400
+    except Exception as e:
+        logging.exception("Error in book_appointment")
+        return jsonify({"error": "Internal server error"}), 500
 
-        appt_dt = datetime.combine(appt_date, appt_time)
-        if appt_dt <= _now():
-            return jsonify({"error": "Appointment must be scheduled in the future"}), 400
+def _bulk_items(data, key):
+    """Pull the item list for a bulk request, or return an error message"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, f"{key} must be a non-empty list"
+    if len(items) > BULK_MAX_ITEMS:
+        return None, f"At most {BULK_MAX_ITEMS} {key} per request"
+    return items, None
+
+def _bulk_summary(results):
+    counts = {}
+    for r in results:
+        counts[r['result']] = counts.get(r['result'], 0) + 1
+    return counts
+
+@appointments_bp.route('/api/book/bulk', methods=['POST'])
+def book_appointments_bulk():
+    """
+    Book many appointments in one transaction.
+    Body: {"appointments": [<same fields as /api/book>, ...]}
+    Each item gets a result (created | conflict | doctor_not_found | invalid);
+    a taken slot only fails that item, never the whole batch.
+    """
+    try:
+        items, error = _bulk_items(request.get_json(force=True) or {}, 'appointments')
+        if error:
+            return jsonify({"error": error}), 400
+
+        results = [None] * len(items)
+        pending = {}  # (doctor_id, date, time) -> (index, booking)
+        for index, data in enumerate(items):
+            booking, error = _validate_booking(data)
+            if error:
+                results[index] = {"index": index, "result": "invalid", "error": error}
+                continue
+            slot = booking[3:6]
+            if slot in pending:
+                results[index] = {"index": index, "result": "conflict",
+                                  "error": "Duplicate time slot within this request"}
+                continue
+            pending[slot] = (index, booking)
 
         conn = get_db_connection()
-        try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                # Make sure the doctor exists and is verified
+        created = {}
+        with conn.cursor() as cur:
+            doctors = {}
+            if pending:
                 cur.execute(
-                    "SELECT id, name FROM doctors WHERE id = %s AND is_verified = TRUE;",
-                    (doctor_id,)
+                    "SELECT id, name FROM doctors WHERE id = ANY(%s) AND is_verified = TRUE;",
+                    (sorted({slot[0] for slot in pending}),)
                 )
-                doctor = cur.fetchone()
-                if not doctor:
-                    return jsonify({"error": "Doctor not found or not verified"}), 404
-
-                # Check business-hours or availability here if you add a schedule table
-
-                # Try insert; unique index will prevent double-booking
-                try:
-                    cur.execute("""
-                        INSERT INTO appointments
-                            (patient_name, patient_email, patient_phone, doctor_id,
-                             appointment_date, appointment_time, reason, status)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, 'pending')
-                        RETURNING id;
-                    """, (patient_name, patient_email, patient_phone, doctor_id,
-                          appt_date, appt_time, reason))
-                    appt_id = cur.fetchone()['id']
-                    conn.commit()
-                except psycopg2.Error as e:
-                    conn.rollback()
-                    # Unique violation -> slot already taken by another request
-                    if getattr(e, 'pgcode', None) == psycopg2.errorcodes.UNIQUE_VIOLATION:
-                        return jsonify({"error": "This time slot is already booked"}), 409
-                    logging.exception("DB error inserting appointment")
-                    return jsonify({"error": "Failed to book appointment"}), 500
-
-                return jsonify({
-                    "message": "Appointment booked successfully",
-                    "appointment_id": appt_id,
-                    "doctor_name": doctor['name'],
-                    "appointment_date": appt_date.isoformat(),
-                    "appointment_time": appt_time.strftime("%H:%M"),
+                doctors = {row['id']: row['name'] for row in cur.fetchall()}
+
+            rows = []
+            for slot, (index, booking) in pending.items():
+                if slot[0] in doctors:
+                    rows.append(booking)
+                else:
+                    results[index] = {"index": index, "result": "doctor_not_found",
+                                      "error": "Doctor not found or not verified"}
+
+            if rows:
+                # One INSERT for the whole batch; slots already taken are skipped
+                # via the uniq_active_slot partial index instead of aborting
+                inserted = psycopg2.extras.execute_values(cur, """
+                    INSERT INTO appointments
+                        (patient_name, patient_email, patient_phone, doctor_id,
+                         appointment_date, appointment_time, reason)
+                    VALUES %s
+                    ON CONFLICT (doctor_id, appointment_date, appointment_time)
+                        WHERE status IN ('pending','confirmed') DO NOTHING
+                    RETURNING *;
+                """, rows, page_size=len(rows), fetch=True)
+                created = {(r['doctor_id'], r['appointment_date'], r['appointment_time']): r['id']
+                           for r in inserted}
+        conn.commit()
+        if created:
+            agenda_store.apply(inserted)
+
+        for (doctor_id, appt_date) in {(slot[0], slot[1]) for slot in created}:
+            slot_cache.invalidate(doctor_id, appt_date)
+
+        for slot, (index, booking) in pending.items():
+            if results[index] is not None:
+                continue
+            if slot in created:
+                results[index] = {
+                    "index": index,
+                    "result": "created",
+                    "appointment_id": created[slot],
+                    "doctor_name": doctors[slot[0]],
+                    "appointment_date": slot[1].isoformat(),
+                    "appointment_time": slot[2].strftime("%H:%M"),
                     "status": "pending"
-                }), 201
-        finally:
-            conn.close()
+                }
+            else:
+                results[index] = {"index": index, "result": "conflict",
+                                  "error": "This time slot is already booked"}
 
-    except Exception as e:
-        logging.exception("Error in book_appointment")
+        return jsonify({"summary": _bulk_summary(results), "results": results}), 200
+
+    except Exception:
+        logging.exception("Error in book_appointments_bulk")
         return jsonify({"error": "Internal server error"}), 500
 
 # --------------------------- LIST ------------------------------------
 
+def _encode_cursor(apt) -> str:
+    raw = f"{apt['appointment_date'].isoformat()}|{apt['appointment_time'].isoformat()}|{apt['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(value: str):
+    raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+    d, t, appt_id = raw.split('|')
+    return ddate.fromisoformat(d), dtime.fromisoformat(t), int(appt_id)
+
+def _estimate_count(cur, base: str, params) -> int:
+    """Planner row estimate: O(1) instead of a COUNT(*) over the JOIN"""
+    cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 {base};", params)
+    plan = cur.fetchone()['QUERY PLAN']
+    return int(plan[0]['Plan']['Plan Rows'])
+
 @appointments_bp.route('/api/appointments', methods=['GET'])
 def get_appointments():
     """
@@ -168,6 +290,9 @@ def get_appointments():
       - from_date (YYYY-MM-DD)
       - to_date (YYYY-MM-DD)
       - page (default 1), per_page (default 10)
+      - pagination=cursor with optional cursor (keyset mode; use next_cursor
+        from the previous response instead of page)
+      - count (exact|estimate|none; default exact for page mode, none for cursor mode)
     """
     try:
         doctor_id = request.args.get('doctor_id')
@@ -183,6 +308,18 @@ def get_appointments():
 
         offset = (page - 1) * per_page
 
+        keyset = request.args.get('pagination') == 'cursor' or 'cursor' in request.args
+        count_mode = request.args.get('count', 'none' if keyset else 'exact')
+        if count_mode not in ('exact', 'estimate', 'none'):
+            return jsonify({"error": "count must be exact, estimate or none"}), 400
+
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = _decode_cursor(request.args['cursor'])
+            except (ValueError, TypeError):
+                return jsonify({"error": "Invalid cursor"}), 400
+
         where = ["1=1"]
         params = []
 
@@ -191,7 +328,7 @@ def get_appointments():
             params.append(int(doctor_id))
 
         if status:
-            if status not in ('pending', 'confirmed', 'completed', 'cancelled'):
+            if status not in VALID_STATUSES:
                 return jsonify({"error": "Invalid status"}), 400
             where.append("a.status = %s")
             params.append(status)
@@ -213,97 +350,379 @@ def get_appointments():
             params.append(td)
 
         conn = get_db_connection()
-        try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                base = f"""
-                    FROM appointments a
-                    JOIN doctors d ON a.doctor_id = d.id
-                    WHERE {' AND '.join(where)}
-                """
-                # Total count
+        with conn.cursor() as cur:
+            base = f"""
+                FROM appointments a
+                JOIN doctors d ON a.doctor_id = d.id
+                WHERE {' AND '.join(where)}
+            """
+            # Total count
+            total = None
+            if count_mode == 'exact':
                 cur.execute(f"SELECT COUNT(*) AS count {base};", params)
                 total = cur.fetchone()['count']
-
-                # Page
+            elif count_mode == 'estimate':
+                total = _estimate_count(cur, base, params)
+
+            # Page; id breaks ties so keyset pages never skip or repeat rows
+            order = "ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC"
+            if keyset:
+                seek = ""
+                page_params = list(params)
+                if after:
+                    seek = "AND (a.appointment_date, a.appointment_time, a.id) < (%s, %s, %s)"
+                    page_params.extend(after)
+                cur.execute(
+                    f"""
+                    SELECT a.*, d.name AS doctor_name, d.specialization
+                    {base} {seek}
+                    {order}
+                    LIMIT %s;
+                    """,
+                    page_params + [per_page + 1]
+                )
+                rows = cur.fetchall()
+                has_more = len(rows) > per_page
+                rows = rows[:per_page]
+            else:
                 cur.execute(
                     f"""
                     SELECT a.*, d.name AS doctor_name, d.specialization
                     {base}
-                    ORDER BY a.appointment_date DESC, a.appointment_time DESC
+                    {order}
                     LIMIT %s OFFSET %s;
                     """,
                     params + [per_page, offset]
                 )
                 rows = cur.fetchall()
 
-            items = []
-            for apt in rows:
-                items.append({
-                    "id": apt['id'],
-                    "patient_name": apt['patient_name'],
-                    "patient_email": apt['patient_email'],
-                    "patient_phone": apt['patient_phone'],
-                    "doctor_id": apt['doctor_id'],
-                    "doctor_name": apt['doctor_name'],
-                    "specialization": apt['specialization'],
-                    "appointment_date": apt['appointment_date'].isoformat(),
-                    "appointment_time": apt['appointment_time'].strftime("%H:%M"),
-                    "reason": apt['reason'],
-                    "status": apt['status'],
-                    "notes": apt['notes'],
-                    "created_at": apt['created_at'].isoformat(),
-                    "updated_at": apt['updated_at'].isoformat(),
-                })
-
+        items = []
+        for apt in rows:
+            items.append({
+                "id": apt['id'],
+                "patient_name": apt['patient_name'],
+                "patient_email": apt['patient_email'],
+                "patient_phone": apt['patient_phone'],
+                "doctor_id": apt['doctor_id'],
+                "doctor_name": apt['doctor_name'],
+                "specialization": apt['specialization'],
+                "appointment_date": apt['appointment_date'].isoformat(),
+                "appointment_time": apt['appointment_time'].strftime("%H:%M"),
+                "reason": apt['reason'],
+                "status": apt['status'],
+                "notes": apt['notes'],
+                "version": apt['version'],
+                "created_at": apt['created_at'].isoformat(),
+                "updated_at": apt['updated_at'].isoformat(),
+            })
+
+        if keyset:
             return jsonify({
-                "page": page,
                 "per_page": per_page,
+                "next_cursor": _encode_cursor(rows[-1]) if rows and has_more else None,
                 "total": total,
                 "appointments": items
             }), 200
-        finally:
-            conn.close()
+
+        return jsonify({
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "appointments": items
+        }), 200
 
     except Exception as e:
         logging.exception("Error getting appointments")
         return jsonify({"error": "Failed to retrieve appointments"}), 500
 
+# --------------------------- FREE SLOTS ------------------------------
+
+@appointments_bp.route('/api/slots', methods=['GET'])
+def get_free_slots():
+    """
+    Free appointment slots computed from doctor_availability minus active
+    appointments:
+      - doctor_id (required, comma-separated for several doctors)
+      - from_date (YYYY-MM-DD, default today)
+      - to_date (YYYY-MM-DD, default from_date + 6 days, at most 31 days)
+    """
+    try:
+        try:
+            doctor_ids = sorted({int(v) for v in request.args.get('doctor_id', '').split(',') if v.strip()})
+        except ValueError:
+            return jsonify({"error": "doctor_id must be a comma-separated list of integers"}), 400
+        if not doctor_ids:
+            return jsonify({"error": "doctor_id is required"}), 400
+        if len(doctor_ids) > 50:
+            return jsonify({"error": "At most 50 doctors per request"}), 400
+
+        now = _now()
+        try:
+            from_date = _parse_date(request.args['from_date']) if request.args.get('from_date') else now.date()
+            to_date = _parse_date(request.args['to_date']) if request.args.get('to_date') else from_date + timedelta(days=6)
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        from_date = max(from_date, now.date())
+        if to_date < from_date:
+            return jsonify({"error": "to_date must not be before from_date"}), 400
+        if (to_date - from_date).days > 31:
+            return jsonify({"error": "Date range must be at most 31 days"}), 400
+
+        conn = get_db_connection()
+        bitmaps = free_slots(conn, doctor_ids, from_date, to_date)
+
+        # Slots earlier today are never offered; masked here so cached bitmaps stay reusable
+        past_mask = (1 << (slot_index(now.time()) + 1)) - 1
+
+        slots = {}
+        for (doctor_id, day), bitmap in sorted(bitmaps.items()):
+            if day == now.date():
+                bitmap &= ~past_mask
+            slots.setdefault(str(doctor_id), {})[day.isoformat()] = [
+                t.strftime("%H:%M") for t in bitmap_times(bitmap)
+            ]
+
+        return jsonify({
+            "slot_minutes": SLOT_MINUTES,
+            "from_date": from_date.isoformat(),
+            "to_date": to_date.isoformat(),
+            "slots": slots
+        }), 200
+
+    except Exception:
+        logging.exception("Error getting free slots")
+        return jsonify({"error": "Failed to retrieve free slots"}), 500
+
+# --------------------------- AGENDA ----------------------------------
+
+@appointments_bp.route('/api/doctor/agenda', methods=['GET'])
+@doctor_required
+def get_doctor_agenda():
+    """
+    The logged-in doctor's appointments for one day (view=day, default) or
+    the Monday-Sunday week containing it (view=week), grouped by status and
+    by slot. Query: date (YYYY-MM-DD, default today), view. Served from the
+    in-memory agenda snapshots; supports If-None-Match for cheap polling.
+    """
+    try:
+        try:
+            day = _parse_date(request.args['date']) if request.args.get('date') else _now().date()
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        view = request.args.get('view', 'day')
+        if view == 'day':
+            dates = [day]
+        elif view == 'week':
+            monday = day - timedelta(days=day.weekday())
+            dates = [monday + timedelta(days=offset) for offset in range(7)]
+        else:
+            return jsonify({"error": "view must be day or week"}), 400
+
+        payloads = agenda_store.payloads(get_db_connection(), g.doctor_id, dates)
+        etag = hashlib.sha1("".join(day_etag for day_etag, _ in payloads).encode('ascii')).hexdigest()
+
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            body = b'{"doctor_id": %d, "view": "%s", "slot_minutes": %d, "days": [%s]}' % (
+                g.doctor_id, view.encode('ascii'), SLOT_MINUTES, b", ".join(day_body for _, day_body in payloads))
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception:
+        logging.exception("Error getting doctor agenda")
+        return jsonify({"error": "Failed to retrieve agenda"}), 500
+
+# --------------------------- EVENTS ----------------------------------
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@appointments_bp.route('/api/appointments/events', methods=['GET'])
+def appointment_event_stream():
+    """
+    Server-Sent Events for bookings and status changes of the given doctors
+    (doctor_id=1 or doctor_id=1,2,3). Event types: booked, status_changed,
+    updated (notes), plus ready on connect and resync when events may have
+    been missed; reload the appointments list or agenda on either of those.
+    Payloads hold ids, slot and status only, never patient details.
+    """
+    if not appointment_events.enabled:
+        return jsonify({"error": "Live updates are disabled"}), 404
+    try:
+        doctor_ids = sorted({int(v) for v in request.args.get('doctor_id', '').split(',') if v.strip()})
+    except ValueError:
+        return jsonify({"error": "doctor_id must be a comma-separated list of integers"}), 400
+    if not doctor_ids:
+        return jsonify({"error": "doctor_id is required"}), 400
+    if len(doctor_ids) > 50:
+        return jsonify({"error": "At most 50 doctors per request"}), 400
+
+    try:
+        subscription = appointment_events.subscribe(doctor_ids)
+    except EventsBusyError as e:
+        return jsonify({"error": f"{e}. Please try again shortly."}), 503, {'Retry-After': '5'}
+
+    def generate():
+        deadline = time.monotonic() + SSE_MAX_DURATION
+        try:
+            yield "retry: 3000\n" + _sse("ready", {"doctor_ids": doctor_ids})
+            while time.monotonic() < deadline:
+                event = subscription.get(SSE_HEARTBEAT)
+                if event is CLOSE:
+                    return
+                if event is RESYNC or subscription.overflowed:
+                    yield _sse("resync", {})
+                    if subscription.overflowed:
+                        return
+                elif event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield _sse(event['type'], event)
+        finally:
+            appointment_events.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 # --------------------------- UPDATE STATUS ---------------------------
 
-def _update_status(appointment_id: int, new_status: str, notes: str = ""):
+# Allowed status changes. Re-applying the current status is always allowed
+# (notes-only update); completed and cancelled are terminal.
+TRANSITIONS = {
+    'pending': ('confirmed', 'cancelled'),
+    'confirmed': ('completed', 'cancelled'),
+    'completed': (),
+    'cancelled': (),
+}
+
+_TRANSITION_VALUES = ", ".join(
+    f"('{src}', '{dst}')"
+    for src, targets in TRANSITIONS.items()
+    for dst in (src,) + targets
+)
+
+# Validates, applies and audits a batch of transitions in one statement:
+# `cur` locks the target rows (in id order, so concurrent batches cannot
+# deadlock) and reads their latest status/version; `upd` applies only the
+# changes allowed by TRANSITIONS whose expected version (if given) still
+# matches; `hist` records each applied change. The final SELECT reports the
+# outcome for every existing row, so rejections need no extra round trip.
+TRANSITION_SQL = f"""
+    WITH v AS (
+        SELECT * FROM unnest(%s::int[], %s::text[], %s::text[], %s::int[]) AS v(id, status, notes, version)
+    ),
+    cur AS (
+        SELECT a.id, a.status, a.version
+          FROM appointments a JOIN v ON v.id = a.id
+         WHERE %s::int IS NULL OR a.doctor_id = %s
+         ORDER BY a.id
+           FOR UPDATE OF a
+    ),
+    upd AS (
+        UPDATE appointments a
+           SET status = v.status,
+               notes = v.notes,
+               updated_at = NOW(),
+               version = a.version + 1
+          FROM v, cur
+         WHERE a.id = v.id
+           AND cur.id = a.id
+           AND (cur.status, v.status) IN (VALUES {_TRANSITION_VALUES})
+           AND (v.version IS NULL OR v.version = cur.version)
+     RETURNING a.id, a.doctor_id, a.appointment_date, a.status, a.notes, a.version,
+               cur.status AS from_status
+    ),
+    hist AS (
+        INSERT INTO appointment_status_history (appointment_id, from_status, to_status, notes)
+        SELECT id, from_status, status, notes FROM upd
+    )
+    SELECT cur.id, cur.status AS current_status, cur.version AS current_version,
+           upd.id IS NOT NULL AS applied, upd.status, upd.notes, upd.version,
+           upd.doctor_id, upd.appointment_date
+      FROM cur LEFT JOIN upd ON upd.id = cur.id;
+"""
+
+def _apply_transitions(changes, doctor_id=None):
+    """
+    Apply [(appointment_id, new_status, notes, expected_version or None)] in
+    one statement and transaction. Returns {appointment_id: outcome row};
+    ids that do not exist (or, given doctor_id, belong to another doctor)
+    are absent. A row with applied = False was
+    rejected: either TRANSITIONS forbids current_status -> new status or its
+    version no longer matches.
+    """
+    ids, statuses, notes, versions = (list(col) for col in zip(*changes))
     conn = get_db_connection()
+    with conn.cursor() as cur:
+        cur.execute(TRANSITION_SQL, (ids, statuses, [_trim(n, 1000) for n in notes], versions,
+                                     doctor_id, doctor_id))
+        rows = {row['id']: row for row in cur.fetchall()}
+    conn.commit()
+    applied = [row for row in rows.values() if row['applied']]
+    for row in applied:
+        slot_cache.invalidate(row['doctor_id'], row['appointment_date'])
+    agenda_store.apply(applied)
+    return rows
+
+def _rejection(row, new_status, expected_version):
+    """(result, error) explaining why a transition was not applied"""
+    if new_status != row['current_status'] and new_status not in TRANSITIONS[row['current_status']]:
+        return "invalid_transition", f"Cannot change status from {row['current_status']} to {new_status}"
+    return "version_conflict", (f"Appointment was modified (version {row['current_version']}, "
+                                f"expected {expected_version})")
+
+def _parse_version(data):
+    """Optional expected version from the body or an If-Match header; raises ValueError"""
+    version = data.get('version') if isinstance(data, dict) else None
+    if version is None and request.if_match and not request.if_match.star_tag:
+        version = next(iter(request.if_match), None)
+    return None if version is None else int(version)
+
+def _transition(appointment_id: int, new_status: str, message: str):
+    """
+    Shared handler for PUT and the confirm/complete/cancel endpoints. With a
+    doctor token only that doctor's appointments can be changed.
+    """
+    data = request.get_json(silent=True) or {}
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute("""
-                UPDATE appointments
-                   SET status = %s,
-                       notes = %s,
-                       updated_at = NOW()
-                 WHERE id = %s
-             RETURNING id;
-            """, (new_status, _trim(notes, 1000), appointment_id))
-            row = cur.fetchone()
-        conn.commit()
-        return bool(row)
-    finally:
-        conn.close()
+        expected_version = _parse_version(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "version must be an integer"}), 400
+
+    row = _apply_transitions([(appointment_id, new_status, data.get('notes', '') or '', expected_version)],
+                             g.get('doctor_id')).get(appointment_id)
+    if row is None:
+        return jsonify({"error": "Appointment not found"}), 404
+    if not row['applied']:
+        _, error = _rejection(row, new_status, expected_version)
+        return jsonify({
+            "error": error,
+            "status": row['current_status'],
+            "version": row['current_version']
+        }), 409
+    return jsonify({"message": message, "status": row['status'], "version": row['version']}), 200
 
 @appointments_bp.route('/api/appointments/<int:appointment_id>', methods=['PUT'])
+@doctor_required
 def update_appointment(appointment_id):
-    """General update for status or notes."""
+    """
+    General update for status or notes, by the appointment's doctor. Pass
+    "version" (or If-Match) to make the update conditional on the version
+    last read.
+    """
     try:
         data = request.get_json(force=True) or {}
         status = data.get('status')
-        notes = data.get('notes', '')
 
-        if status not in ('pending', 'confirmed', 'completed', 'cancelled'):
+        if status not in VALID_STATUSES:
             return jsonify({"error": "Invalid status"}), 400
 
-        ok = _update_status(appointment_id, status, notes)
-        if not ok:
-            return jsonify({"error": "Appointment not found"}), 404
-
-        return jsonify({"message": "Appointment updated successfully"}), 200
+        return _transition(appointment_id, status, "Appointment updated successfully")
     except Exception:
         logging.exception("Error updating appointment")
         return jsonify({"error": "Failed to update appointment"}), 500
@@ -311,21 +730,19 @@ def update_appointment(appointment_id):
 # Explicit endpoints for common transitions (nice for frontend)
 
 @appointments_bp.route('/api/appointments/<int:appointment_id>/confirm', methods=['POST'])
+@doctor_required
 def confirm_appointment(appointment_id):
     try:
-        notes = _trim((request.get_json() or {}).get('notes', ''))
-        ok = _update_status(appointment_id, 'confirmed', notes)
-        return (jsonify({"message": "Appointment confirmed"}), 200) if ok else (jsonify({"error": "Not found"}), 404)
+        return _transition(appointment_id, 'confirmed', "Appointment confirmed")
     except Exception:
         logging.exception("Error confirming appointment")
         return jsonify({"error": "Failed to confirm appointment"}), 500
 
 @appointments_bp.route('/api/appointments/<int:appointment_id>/complete', methods=['POST'])
+@doctor_required
 def complete_appointment(appointment_id):
     try:
-        notes = _trim((request.get_json() or {}).get('notes', ''))
-        ok = _update_status(appointment_id, 'completed', notes)
-        return (jsonify({"message": "Appointment completed"}), 200) if ok else (jsonify({"error": "Not found"}), 404)
+        return _transition(appointment_id, 'completed', "Appointment completed")
     except Exception:
         logging.exception("Error completing appointment")
         return jsonify({"error": "Failed to complete appointment"}), 500
@@ -333,9 +750,100 @@ def complete_appointment(appointment_id):
 @appointments_bp.route('/api/appointments/<int:appointment_id>/cancel', methods=['POST'])
 def cancel_appointment(appointment_id):
     try:
-        notes = _trim((request.get_json() or {}).get('notes', ''))
-        ok = _update_status(appointment_id, 'cancelled', notes)
-        return (jsonify({"message": "Appointment cancelled"}), 200) if ok else (jsonify({"error": "Not found"}), 404)
+        return _transition(appointment_id, 'cancelled', "Appointment cancelled")
     except Exception:
         logging.exception("Error cancelling appointment")
         return jsonify({"error": "Failed to cancel appointment"}), 500
+
+@appointments_bp.route('/api/appointments/<int:appointment_id>/history', methods=['GET'])
+def get_appointment_history(appointment_id):
+    """Status changes of one appointment, oldest first."""
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT from_status, to_status, notes, changed_at
+                  FROM appointment_status_history
+                 WHERE appointment_id = %s
+                 ORDER BY id;
+            """, (appointment_id,))
+            rows = cur.fetchall()
+        return jsonify({
+            "appointment_id": appointment_id,
+            "history": [{
+                "from_status": r['from_status'],
+                "to_status": r['to_status'],
+                "notes": r['notes'],
+                "changed_at": r['changed_at'].isoformat()
+            } for r in rows]
+        }), 200
+    except Exception:
+        logging.exception("Error getting appointment history")
+        return jsonify({"error": "Failed to retrieve appointment history"}), 500
+
+# --------------------------- BULK STATUS -----------------------------
+
+@appointments_bp.route('/api/appointments/bulk-status', methods=['POST'])
+@doctor_required
+def update_appointments_bulk():
+    """
+    Change the status of many of the calling doctor's appointments in one
+    transaction.
+    Body: {"updates": [{"appointment_id": 1, "status": "completed", "notes": "", "version": 3}, ...]}
+    ("version" is optional). Each item gets a result (updated | not_found |
+    invalid_transition | version_conflict | invalid).
+    """
+    try:
+        items, error = _bulk_items(request.get_json(force=True) or {}, 'updates')
+        if error:
+            return jsonify({"error": error}), 400
+
+        results = [None] * len(items)
+        changes = {}  # appointment_id -> (index, status, notes, version)
+        for index, data in enumerate(items):
+            if not isinstance(data, dict):
+                results[index] = {"index": index, "result": "invalid", "error": "Update must be an object"}
+                continue
+            try:
+                appointment_id = int(data.get('appointment_id'))
+                version = None if data.get('version') is None else int(data['version'])
+            except (TypeError, ValueError):
+                results[index] = {"index": index, "result": "invalid",
+                                  "error": "appointment_id and version must be integers"}
+                continue
+            status = data.get('status')
+            if status not in VALID_STATUSES:
+                results[index] = {"index": index, "result": "invalid", "error": "Invalid status"}
+                continue
+            if appointment_id in changes:
+                results[index] = {"index": index, "result": "invalid",
+                                  "error": "Duplicate appointment_id within this request"}
+                continue
+            changes[appointment_id] = (index, status, data.get('notes', '') or '', version)
+
+        rows = {}
+        if changes:
+            rows = _apply_transitions([
+                (appointment_id, status, notes, version)
+                for appointment_id, (_, status, notes, version) in changes.items()
+            ], g.doctor_id)
+
+        for appointment_id, (index, status, _, version) in changes.items():
+            row = rows.get(appointment_id)
+            if row is None:
+                results[index] = {"index": index, "result": "not_found",
+                                  "appointment_id": appointment_id, "error": "Appointment not found"}
+            elif row['applied']:
+                results[index] = {"index": index, "result": "updated", "appointment_id": appointment_id,
+                                  "status": row['status'], "version": row['version']}
+            else:
+                result, error = _rejection(row, status, version)
+                results[index] = {"index": index, "result": result, "appointment_id": appointment_id,
+                                  "error": error, "status": row['current_status'],
+                                  "version": row['current_version']}
+
+        return jsonify({"summary": _bulk_summary(results), "results": results}), 200
+
+    except Exception:
+        logging.exception("Error in update_appointments_bulk")
+        return jsonify({"error": "Failed to update appointments"}), 500
@@ -1,138 +1,242 @@
 import os
+import json
+import time
 import logging
-from flask import Blueprint, request, jsonify
-import google.generativeai as genai
-from app.db.connection import get_db_connection
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.db.connection import get_db_connection, db_connection
+from app.db.chat_history_writer import get_history_writer
+from app.services.llm import model_registry, load_prompt, backend_configured, stream_text
+from app.services.async_chat import get_chat_worker, ChatBusyError, ChatTimeoutError
+from app.services.chat_context import history_cache, build_contents, CONTEXT_TOKEN_BUDGET
+from app.services.response_cache import response_cache
+from app.services.urgent_symptoms import is_urgent
 import uuid
 from datetime import datetime
 
 chatbot_bp = Blueprint('chatbot', __name__)
 
-# Configure Gemini API
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+MODEL_NAME = 'gemini-1.5-flash'
 
-@chatbot_bp.route('/api/chat', methods=['POST'])
-def chat():
-    """Handle medical chatbot queries using Gemini API"""
-    try:
-        # Check if API key is configured
-        if not os.environ.get("GEMINI_API_KEY"):
-            return jsonify({"error": "Gemini API key not configured"}), 500
-            
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        session_id = data.get('session_id', str(uuid.uuid4()))
-        
-        if not user_message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        # Medical-focused system prompt
-        system_prompt = """You are MediMind, a warm, compassionate, and professional medical expert assistant.
-        Your role is to make users feel comfortable, understood, and safe while helping them understand their health situation based on their symptoms.
-        You are not a doctor, but you are skilled at identifying possible conditions from symptoms, asking clear questions, and suggesting safe, practical next steps.
-        You must never prescribe or recommend any medicines.
+GENERATION_CONFIG = {
+    'temperature': 0.7,
+    'max_output_tokens': 1000,
+}
 
-        1. Greeting & Comfort
+# Medical-focused system prompt, loaded from app/prompts/medimind_system_<version>.txt
+SYSTEM_PROMPT_VERSION = os.environ.get('CHAT_SYSTEM_PROMPT_VERSION', 'v1')
+SYSTEM_PROMPT = load_prompt('medimind_system', SYSTEM_PROMPT_VERSION)
 
-        Begin every conversation with a gentle and friendly tone, thanking the user for sharing and acknowledging their situation.
+FALLBACK_RESPONSE = "I apologize, but I couldn't generate a response. Please try again."
 
-        Use warm language and avoid sounding robotic.
+# Cached responses are only valid for the model and prompt that produced them
+CACHE_NAMESPACE = f"{MODEL_NAME}:{SYSTEM_PROMPT_VERSION}"
 
-        Make the user feel safe to share without fear of judgment.
 
-        2. Adaptive Conversation Length
+def _get_model():
+    return model_registry.get(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG)
 
-        Detect the user’s mood and willingness to talk from their responses.
 
-        Low-energy, unwell, or short replies → Keep the chat brief, only ask essential questions, then give advice and a conclusion quickly.
+@chatbot_bp.record_once
+def _warm_model_registry(state):
+    if backend_configured():
+        _get_model()
 
-        Engaged, open, and detailed replies → Ask a few more targeted questions to gather more context, but avoid dragging the conversation forever.
 
-        Always ask one question at a time so it’s easy for the user to respond.
+def _wants_stream(data):
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
 
-        3. Question Strategy
 
-        Start with broad, symptom-related questions.
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
-        Gradually move to specific follow-ups based on the user’s answers.
 
-        Ask about relevant factors:
-
-        Onset & duration of symptoms
-
-        Severity & frequency
-
-        Related conditions or recent changes
-
-        Lifestyle or environmental triggers
+def _load_turns(session_id, limit):
+    """
+    The most recent turns of a session from chat_history, oldest first, and
+    the session's total row count. Uses a short-lived checkout rather than
+    the request connection, which would otherwise stay out of the pool for
+    the whole model call.
+    """
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('''
+                SELECT user_message, bot_response, COUNT(*) OVER () AS total
+                FROM chat_history
+                WHERE session_id = %s
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            ''', (session_id, limit))
+            rows = cur.fetchall()
+    total = rows[0]['total'] if rows else 0
+    return [(row['user_message'], row['bot_response']) for row in reversed(rows)], total
 
-        Avoid medical jargon unless explaining it clearly.
 
-        4. Response Style
+def _count_turns(session_id):
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT COUNT(*) AS total FROM chat_history WHERE session_id = %s', (session_id,))
+            return cur.fetchone()['total']
 
-        Keep answers short, friendly, and easy to read.
 
-        Show empathy: e.g., “I understand that must be uncomfortable for you.”
+def _build_context(session_id, user_message, new_session):
+    """Assemble prior turns plus the new message within the token budget"""
+    if new_session:
+        history_cache.start_session(session_id)
+        return build_contents([], user_message, CONTEXT_TOKEN_BUDGET)
+    try:
+        turns = history_cache.get(session_id, _load_turns, _count_turns)
+    except Exception as db_error:
+        logging.error(f"Failed to load chat context: {db_error}")
+        turns = []
+    return build_contents(turns, user_message, CONTEXT_TOKEN_BUDGET)
 
-        Use natural conversation flow, not a rigid Q&A format.
 
-        Where possible, summarize findings in simple terms.
+def _save_chat_history(session_id, user_message, bot_response):
+    """Queue a chat turn for the background writer and update the session cache"""
+    history_cache.append(session_id, user_message, bot_response)
+    get_history_writer().enqueue(session_id, user_message, bot_response)
 
-        5. Advice & Closing
 
-        Suggest safe self-care and precautionary steps (rest, hydration, diet adjustments, avoiding certain activities, etc.).
+def _cache_messages(contents):
+    return [part for content in contents for part in content['parts']]
 
-        Never suggest or name any medicines.
 
-        At the end, give a clear, friendly recommendation:
+def _stream_cached(bot_response, session_id):
+    """Send a cached reply using the same event sequence as a live stream"""
+    def generate():
+        yield _sse('chunk', {"text": bot_response})
+        yield _sse('done', {
+            "response": bot_response,
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "cached": True,
+            "ttft_ms": 0.0,
+            "total_ms": 0.0
+        })
 
-        If symptoms seem concerning → “Based on what you’ve told me, I recommend visiting a doctor soon.”
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-        If symptoms are mild/manageable → “It seems you might be able to manage this with rest and precautions for now, but see a doctor if it worsens.”
 
-        End with an encouraging note and let the user know they can return anytime if they have more concerns.
+def _stream_chat(model, contents, user_message, session_id, cache_messages=None):
+    """Forward model chunks to the client as Server-Sent Events"""
+    worker = get_chat_worker()
+    started = time.monotonic()
+    chunks = worker.stream(lambda: stream_text(model, contents))
 
-        6. Safety Boundaries
+    # Wait for the first chunk before committing to a 200 so busy/timeout
+    # errors still map to proper status codes
+    try:
+        first = next(chunks, None)
+    except ChatBusyError:
+        return jsonify({"error": "The assistant is busy right now. Please try again shortly."}), 503
+    except ChatTimeoutError:
+        logging.warning(f"Chat stream timed out for session {session_id}")
+        return jsonify({"error": "The assistant took too long to respond. Please try again."}), 504
+    ttft = time.monotonic() - started
+
+    def generate():
+        parts = []
+        try:
+            if first is not None:
+                parts.append(first)
+                yield _sse('chunk', {"text": first})
+            for chunk in chunks:
+                parts.append(chunk)
+                yield _sse('chunk', {"text": chunk})
+        except Exception as e:
+            logging.error(f"Chat stream error: {e}")
+            yield _sse('error', {"error": "Failed to process your message. Please try again."})
+            return
+        finally:
+            chunks.close()
+
+        bot_response = ''.join(parts).strip()
+        if bot_response and cache_messages is not None:
+            response_cache.put(CACHE_NAMESPACE, cache_messages, bot_response)
+        bot_response = bot_response or FALLBACK_RESPONSE
+        total = time.monotonic() - started
+        worker.record_stream(ttft, total)
+        _save_chat_history(session_id, user_message, bot_response)
+
+        yield _sse('done', {
+            "response": bot_response,
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "ttft_ms": round(ttft * 1000.0, 1),
+            "total_ms": round(total * 1000.0, 1)
+        })
 
-        If the user shares severe or urgent symptoms (e.g., chest pain, difficulty breathing, sudden weakness), immediately tell them to seek medical help right away.
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-        If unsure, lean toward recommending professional consultation.
 
-        IMPORTANT:
-        - Keep responses short and concise (2-3 sentences max unless more detail is essential)
-        - Be professional, empathetic, and responsible
-        - Avoid unnecessary long explanations unless the user explicitly asks for details
-        """
+@chatbot_bp.route('/api/chat', methods=['POST'])
+def chat():
+    """Handle medical chatbot queries using Gemini API"""
+    try:
+        # Check if API key is configured
+        if not backend_configured():
+            return jsonify({"error": "Gemini API key not configured"}), 500
+            
+        data = request.get_json()
+        user_message = data.get('message', '').strip()
+        session_id = data.get('session_id')
+        new_session = not session_id
+        session_id = session_id or str(uuid.uuid4())
+        
+        if not user_message:
+            return jsonify({"error": "Message is required"}), 400
         
-        # Initialize the model with system instruction
-        model = genai.GenerativeModel(
-            model_name='gemini-1.5-flash',
-            system_instruction=system_prompt
-        )
+        # Reuse the model built at startup for this prompt/config
+        model = _get_model()
         
-        # Generate response using Gemini
-        response = model.generate_content(
-            user_message,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=1000,
+        # Prior turns of this session, bounded by the context token budget
+        contents = _build_context(session_id, user_message, new_session)
+        
+        # Serve repeated questions from the response cache, except urgent
+        # symptoms which always get a fresh answer
+        cache_messages = None
+        if is_urgent(user_message):
+            response_cache.record_bypass()
+        else:
+            cache_messages = _cache_messages(contents)
+            cached = response_cache.get(CACHE_NAMESPACE, cache_messages)
+            if cached is not None:
+                _save_chat_history(session_id, user_message, cached)
+                if _wants_stream(data):
+                    return _stream_cached(cached, session_id)
+                return jsonify({
+                    "response": cached,
+                    "session_id": session_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "cached": True
+                })
+        
+        if _wants_stream(data):
+            return _stream_chat(model, contents, user_message, session_id, cache_messages)
+        
+        # Generate response on the async chat worker so the LLM round trip
+        # is bounded by the in-flight limit and request timeout
+        try:
+            response = get_chat_worker().call(
+                lambda: model.generate_content_async(contents)
             )
-        )
+        except ChatBusyError:
+            return jsonify({"error": "The assistant is busy right now. Please try again shortly."}), 503
+        except ChatTimeoutError:
+            logging.warning(f"Chat request timed out for session {session_id}")
+            return jsonify({"error": "The assistant took too long to respond. Please try again."}), 504
         
-        bot_response = response.text or "I apologize, but I couldn't generate a response. Please try again."
+        bot_response = response.text
+        if bot_response and cache_messages is not None:
+            response_cache.put(CACHE_NAMESPACE, cache_messages, bot_response)
+        bot_response = bot_response or FALLBACK_RESPONSE
         
         # Save chat history to database
-        try:
-            conn = get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute('''
-                    INSERT INTO chat_history (session_id, user_message, bot_response)
-                    VALUES (%s, %s, %s)
-                ''', (session_id, user_message, bot_response))
-                conn.commit()
-            conn.close()
-        except Exception as db_error:
-            logging.error(f"Failed to save chat history: {db_error}")
+        _save_chat_history(session_id, user_message, bot_response)
         
         return jsonify({
             "response": bot_response,
@@ -159,8 +263,6 @@ def get_chat_history(session_id):
             
             history = cur.fetchall()
         
-        conn.close()
-        
         return jsonify({
             "history": [
                 {
@@ -1,25 +1,17 @@
 import logging
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from app.db.connection import get_db_connection
+from flask import Blueprint, Response, g, request, jsonify
+from app.db.connection import get_db_connection, db_connection, unique_violation
+from app.services.auth import get_password_hasher, AuthBusyError, AuthTimeoutError
+from app.services.tokens import get_token_service, doctor_required, InvalidTokenError
+from app.services.doctor_directory import doctor_directory
 
 doctors_bp = Blueprint('doctors', __name__)
-import psycopg2
-import psycopg2.extras
-import os
 
-def get_db_connection():
-    return psycopg2.connect(
-        dbname="dhp2024",
-        user="postgres",
-        password="Ajay@123",
-        host="localhost",
-        cursor_factory=psycopg2.extras.RealDictCursor
-    )
-
-    # This makes fetchone()/fetchall() return dict-like rows
-    # conn.cursor_factory = psycopg2.extras.RealDictCursor
-    return conn
+# 409 message for each UNIQUE constraint registration can violate
+DUPLICATE_DOCTOR_MESSAGES = {
+    'doctors_email_key': "Email already registered",
+    'doctors_license_number_key': "License number already registered",
+}
 
 
 @doctors_bp.route('/api/doctor/register', methods=['POST'])
@@ -48,23 +40,17 @@ def register_doctor():
         if len(password) < 8:
             return jsonify({"error": "Password must be at least 8 characters long"}), 400
         
-        # Hash password
-        password_hash = generate_password_hash(password)
+        # Hash password (in the hashing pool, off the request thread's CPU)
+        try:
+            password_hash = get_password_hasher().hash_password(password)
+        except (AuthBusyError, AuthTimeoutError):
+            return jsonify({"error": "Too many sign-in requests right now. Please try again shortly."}), 503
         
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
-                # Check if email already exists
-                cur.execute('SELECT id FROM doctors WHERE email = %s', (email,))
-                if cur.fetchone():
-                    return jsonify({"error": "Email already registered"}), 409
-                
-                # Check if license number already exists
-                cur.execute('SELECT id FROM doctors WHERE license_number = %s', (license_number,))
-                if cur.fetchone():
-                    return jsonify({"error": "License number already registered"}), 409
-                
-                # Insert new doctor
+                # Insert new doctor; the UNIQUE constraints on email and
+                # license_number reject duplicates (see except below)
                 cur.execute('''
                     INSERT INTO doctors 
                     (name, email, password_hash, specialization, license_number, phone, bio, experience_years, consultation_fee)
@@ -74,6 +60,7 @@ def register_doctor():
                 
                 doctor_id = cur.fetchone()['id']
                 conn.commit()
+                doctor_directory.invalidate()
                 
                 return jsonify({
                     "message": "Doctor registered successfully. Verification pending.",
@@ -82,15 +69,30 @@ def register_doctor():
                 
         except Exception as e:
             conn.rollback()
+            constraint = unique_violation(e)
+            if constraint in DUPLICATE_DOCTOR_MESSAGES:
+                return jsonify({"error": DUPLICATE_DOCTOR_MESSAGES[constraint]}), 409
             logging.error(f"Database error in register_doctor: {e}")
             return jsonify({"error": "Failed to register doctor"}), 500
-        finally:
-            conn.close()
             
     except Exception as e:
         logging.error(f"Error in register_doctor: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+def _store_rehash(doctor_id, old_hash, new_hash):
+    """Replace a hash made with outdated parameters; best effort, login proceeds regardless"""
+    try:
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                # Skip if the password changed since we read it
+                cur.execute('''
+                    UPDATE doctors SET password_hash = %s
+                    WHERE id = %s AND password_hash = %s
+                ''', (new_hash, doctor_id, old_hash))
+            conn.commit()
+    except Exception as e:
+        logging.error(f"Failed to store rehashed password for doctor {doctor_id}: {e}")
+
 @doctors_bp.route('/api/doctor/login', methods=['POST'])
 def login_doctor():
     """Doctor login"""
@@ -102,20 +104,30 @@ def login_doctor():
         if not email or not password:
             return jsonify({"error": "Email and password are required"}), 400
         
-        conn = get_db_connection()
-        with conn.cursor() as cur:
-            cur.execute('''
-                SELECT id, name, email, password_hash, specialization, is_verified
-                FROM doctors WHERE email = %s
-            ''', (email,))
-            
-            doctor = cur.fetchone()
+        # Short checkout: the request connection would stay out of the pool
+        # while the hash waits its turn in the hashing pool
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT id, name, email, password_hash, specialization, is_verified
+                    FROM doctors WHERE email = %s
+                ''', (email,))
+                
+                doctor = cur.fetchone()
         
-        conn.close()
+        if not doctor:
+            return jsonify({"error": "Invalid email or password"}), 401
         
-        if not doctor or not check_password_hash(doctor['password_hash'], password):
+        try:
+            matches, new_hash = get_password_hasher().verify_password(doctor['password_hash'], password)
+        except (AuthBusyError, AuthTimeoutError):
+            return jsonify({"error": "Too many sign-in requests right now. Please try again shortly."}), 503
+        if not matches:
             return jsonify({"error": "Invalid email or password"}), 401
         
+        if new_hash:
+            _store_rehash(doctor['id'], doctor['password_hash'], new_hash)
+        
         return jsonify({
             "message": "Login successful",
             "doctor": {
@@ -124,51 +136,66 @@ def login_doctor():
                 "email": doctor['email'],
                 "specialization": doctor['specialization'],
                 "is_verified": doctor['is_verified']
-            }
+            },
+            **get_token_service().issue(doctor['id'])
         })
         
     except Exception as e:
         logging.error(f"Error in login_doctor: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@doctors_bp.route('/api/doctor/token/refresh', methods=['POST'])
+def refresh_doctor_token():
+    """Exchange a refresh token for a new access/refresh pair (the old refresh token is revoked)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get('refresh_token')
+        if not refresh_token:
+            return jsonify({"error": "refresh_token is required"}), 400
+        
+        try:
+            return jsonify(get_token_service().refresh(refresh_token))
+        except InvalidTokenError as e:
+            return jsonify({"error": f"{e}. Please log in again."}), 401
+        
+    except Exception as e:
+        logging.error(f"Error in refresh_doctor_token: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@doctors_bp.route('/api/doctor/logout', methods=['POST'])
+@doctor_required
+def logout_doctor():
+    """Revoke the presented access token and, if given, the refresh token"""
+    try:
+        service = get_token_service()
+        claims = g.token_claims
+        service.revoked.revoke(claims['jti'], claims['exp'])
+        
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            service.revoke(refresh_token, 'refresh')
+        
+        return jsonify({"message": "Logged out"})
+        
+    except Exception as e:
+        logging.error(f"Error in logout_doctor: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @doctors_bp.route('/api/doctors', methods=['GET'])
 def get_doctors():
-    """Get all verified doctors"""
+    """Get all verified doctors, served from the in-process directory cache"""
     try:
         specialization = request.args.get('specialization')
         
-        conn = get_db_connection()
-        with conn.cursor() as cur:
-            query = '''
-                SELECT id, name, specialization, bio, experience_years, consultation_fee
-                FROM doctors WHERE is_verified = TRUE
-            '''
-            params = []
-            
-            if specialization:
-                query += ' AND specialization ILIKE %s'
-                params.append(f'%{specialization}%')
-            
-            query += ' ORDER BY name'
-            
-            cur.execute(query, params)
-            doctors = cur.fetchall()
+        etag, body = doctor_directory.payload(specialization)
         
-        conn.close()
-        
-        return jsonify({
-            "doctors": [
-                {
-                    "id": doc['id'],
-                    "name": doc['name'],
-                    "specialization": doc['specialization'],
-                    "bio": doc['bio'],
-                    "experience_years": doc['experience_years'],
-                    "consultation_fee": float(doc['consultation_fee']) if doc['consultation_fee'] else 0.00
-                }
-                for doc in doctors
-            ]
-        })
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         logging.error(f"Error getting doctors: {e}")
@@ -188,8 +215,6 @@ def get_doctor_profile(doctor_id):
             
             doctor = cur.fetchone()
         
-        conn.close()
-        
         if not doctor:
             return jsonify({"error": "Doctor not found"}), 404
         
@@ -214,9 +239,13 @@ def get_doctor_profile(doctor_id):
         return jsonify({"error": "Failed to retrieve doctor profile"}), 500
 
 @doctors_bp.route('/api/doctor/profile/<int:doctor_id>', methods=['PUT'])
+@doctor_required
 def update_doctor_profile(doctor_id):
-    """Update doctor profile"""
+    """Update doctor profile (the logged-in doctor's own only)"""
     try:
+        if g.doctor_id != doctor_id:
+            return jsonify({"error": "You can only update your own profile"}), 403
+        
         data = request.get_json()
         
         # Fields that can be updated
@@ -250,14 +279,13 @@ def update_doctor_profile(doctor_id):
                     return jsonify({"error": "Doctor not found"}), 404
                 
                 conn.commit()
+                doctor_directory.invalidate()
                 return jsonify({"message": "Profile updated successfully"})
                 
         except Exception as e:
             conn.rollback()
             logging.error(f"Database error updating doctor profile: {e}")
             return jsonify({"error": "Failed to update profile"}), 500
-        finally:
-            conn.close()
             
     except Exception as e:
         logging.error(f"Error updating doctor profile: {e}")
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import timedelta
+from collections import OrderedDict
+from app.services.slot_engine import slot_index, slot_time
+
+AGENDA_STATUSES = ('pending', 'confirmed', 'completed', 'cancelled')
+
+AGENDA_SQL = '''
+    SELECT id, doctor_id, appointment_date, appointment_time, patient_name, patient_email,
+           patient_phone, reason, status, notes, version
+    FROM appointments
+    WHERE doctor_id = %s AND appointment_date BETWEEN %s AND %s
+'''
+
+# Fields of an appointment kept in a snapshot; status changes carry only
+# the ones they modify
+_FIELDS = ('appointment_time', 'patient_name', 'patient_email', 'patient_phone', 'reason',
+           'status', 'notes', 'version')
+
+
+class _Day:
+    __slots__ = ('appointments', 'expires_at', 'payload')
+
+    def __init__(self, appointments, expires_at):
+        self.appointments = appointments  # id -> {field: value}
+        self.expires_at = expires_at
+        self.payload = None  # (etag, json bytes), rendered on first read
+
+
+def _render(day, appointments):
+    """One day of the agenda: appointments grouped by status and by slot"""
+    ordered = sorted(appointments.items(), key=lambda item: (item[1]['appointment_time'], item[0]))
+    by_status = {status: [] for status in AGENDA_STATUSES}
+    slots = OrderedDict()
+    for appointment_id, a in ordered:
+        by_status.setdefault(a['status'], []).append({
+            "id": appointment_id,
+            "appointment_time": a['appointment_time'].strftime("%H:%M"),
+            "patient_name": a['patient_name'],
+            "patient_email": a['patient_email'],
+            "patient_phone": a['patient_phone'],
+            "reason": a['reason'],
+            "status": a['status'],
+            "notes": a['notes'],
+            "version": a['version'],
+        })
+        slot = slot_time(slot_index(a['appointment_time'])).strftime("%H:%M")
+        slots.setdefault(slot, []).append(appointment_id)
+    body = json.dumps({
+        "date": day.isoformat(),
+        "counts": {status: len(items) for status, items in by_status.items()},
+        "by_status": by_status,
+        "slots": [{"time": slot, "appointment_ids": ids} for slot, ids in slots.items()],
+    }).encode('utf-8')
+    return hashlib.sha1(body).hexdigest(), body
+
+
+class AgendaStore:
+    """Per-doctor, per-day snapshots of appointments for the agenda endpoint.
+
+    A day is loaded from Postgres on first request and then kept current
+    by apply(), which the booking and status-change handlers call after
+    they commit, so polling dashboards read memory. Each day's JSON is
+    rendered once per change. Versions order concurrent updates to one
+    appointment; a load that overlaps a change to the same day is served
+    but not cached. Changes committed by other processes arrive through the
+    appointment event listener (discard_if_stale); snapshots also expire
+    after max_age seconds as a backstop.
+    """
+
+    def __init__(self, max_age=60.0, max_days=20000):
+        self.max_age = max_age
+        self.max_days = max_days
+        self._days = OrderedDict()  # (doctor_id, date) -> _Day
+        self._changed = OrderedDict()  # (doctor_id, date) -> change sequence number
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _touch_locked(self, key):
+        self._sequence += 1
+        self._changed[key] = self._sequence
+        self._changed.move_to_end(key)
+        while len(self._changed) > self.max_days:
+            self._changed.popitem(last=False)
+
+    def apply(self, rows):
+        """
+        Fold committed changes into cached days. Each row has id, doctor_id,
+        appointment_date and version plus any of the snapshot fields; a new
+        appointment needs all of them. Days that are not cached are skipped.
+        """
+        with self._lock:
+            for row in rows:
+                key = (row['doctor_id'], row['appointment_date'])
+                self._touch_locked(key)
+                day = self._days.get(key)
+                if day is None:
+                    continue
+                current = day.appointments.get(row['id'])
+                if current is None:
+                    if all(field in row for field in _FIELDS):
+                        day.appointments[row['id']] = {field: row[field] for field in _FIELDS}
+                    else:
+                        # Change to an appointment this snapshot never saw
+                        del self._days[key]
+                        continue
+                elif row['version'] > current['version']:
+                    current.update({field: row[field] for field in _FIELDS if field in row})
+                day.payload = None
+
+    def discard_if_stale(self, doctor_id, day, appointment_id, version):
+        """Drop a cached day unless it already holds this version of the appointment.
+
+        Used for change events from other processes, which carry the version
+        but not every field; this process's own changes were applied already.
+        """
+        key = (doctor_id, day)
+        with self._lock:
+            cached = self._days.get(key)
+            current = cached.appointments.get(appointment_id) if cached is not None else None
+            if current is not None and current['version'] >= version:
+                return
+            self._touch_locked(key)
+            self._days.pop(key, None)
+
+    def invalidate(self, doctor_id, day):
+        with self._lock:
+            self._touch_locked((doctor_id, day))
+            self._days.pop((doctor_id, day), None)
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+
+    def _load(self, conn, doctor_id, first, last):
+        days = {first + timedelta(days=offset): {} for offset in range((last - first).days + 1)}
+        with conn.cursor() as cur:
+            cur.execute(AGENDA_SQL, (doctor_id, first, last))
+            for row in cur.fetchall():
+                days[row['appointment_date']][row['id']] = {field: row[field] for field in _FIELDS}
+        return days
+
+    def payloads(self, conn, doctor_id, dates):
+        """[(etag, json bytes)] for each date, loading missing days in one query"""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for day in dates:
+                cached = self._days.get((doctor_id, day))
+                if cached is not None and cached.expires_at > now:
+                    if cached.payload is None:
+                        cached.payload = _render(day, cached.appointments)
+                    result[day] = cached.payload
+            self.hits += len(result)
+            self.misses += len(dates) - len(result)
+            sequence = self._sequence
+
+        missing = [day for day in dates if day not in result]
+        if missing:
+            loaded = self._load(conn, doctor_id, min(missing), max(missing))
+            expires_at = time.monotonic() + self.max_age
+            with self._lock:
+                for day, appointments in loaded.items():
+                    key = (doctor_id, day)
+                    snapshot = _Day(appointments, expires_at)
+                    snapshot.payload = _render(day, appointments)
+                    if day in missing:
+                        result[day] = snapshot.payload
+                    if self._changed.get(key, 0) > sequence:
+                        continue  # changed while loading; the next request reloads
+                    self._days[key] = snapshot
+                    self._days.move_to_end(key)
+                while len(self._days) > self.max_days:
+                    self._days.popitem(last=False)
+        return [result[day] for day in dates]
+
+    def stats(self):
+        with self._lock:
+            return {"days": len(self._days), "hits": self.hits, "misses": self.misses}
+
+
+agenda_store = AgendaStore(max_age=float(os.environ.get('AGENDA_MAX_AGE', 60)))
@@ -0,0 +1,214 @@
+"""Appointment change events: Postgres LISTEN/NOTIFY fanned out to SSE clients.
+
+The appointments trigger (migration 0004) sends a NOTIFY on the
+appointment_events channel for every booking and status change, delivered
+when the transaction commits. Each process runs one listener thread on its
+own connection. The thread:
+
+  * keeps this process's slot and agenda caches in step with changes
+    committed by other workers, and
+  * hands each event to the SSE subscribers watching that doctor.
+
+Events are not replayed. A client (re)loads its data when it receives
+`ready` (on connect) or `resync` (after the listener reconnected or the
+client fell behind), then applies events as they arrive.
+"""
+import os
+import json
+import queue
+import select
+import logging
+import threading
+from datetime import date
+
+import psycopg2
+
+from app.db.connection import connection_params
+from app.services.slot_engine import slot_cache
+from app.services.agenda import agenda_store
+
+CHANNEL = 'appointment_events'
+
+# Sentinels queued to subscribers
+RESYNC = object()
+CLOSE = object()
+
+
+class EventsBusyError(Exception):
+    """Raised when the process already has the maximum number of subscribers"""
+
+
+class Subscription:
+    def __init__(self, doctor_ids, max_queue):
+        self.doctor_ids = frozenset(doctor_ids)
+        self.events = queue.Queue(max_queue)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Next event (dict), RESYNC, CLOSE, or None if nothing arrived within timeout"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AppointmentEventHub:
+    def __init__(self, enabled=True, max_subscribers=32, max_queue=1000, reconnect_delay=1.0):
+        self.enabled = enabled
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.reconnect_delay = reconnect_delay
+        self._by_doctor = {}  # doctor_id -> set of Subscription
+        self._count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._closing = False
+        self.connected = False
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def start(self):
+        """Start the listener thread (idempotent)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='appointment-events', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                if self.reconnects:
+                    # Anything committed while we were disconnected was missed
+                    logging.info("Appointment event listener reconnected")
+                    slot_cache.clear()
+                    agenda_store.clear()
+                    self._broadcast(RESYNC)
+                self.connected = True
+                delay = self.reconnect_delay
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(conn.notifies.pop(0).payload)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logging.error(f"Appointment event listener error: {e}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    conn.close()
+            if self._stop.wait(delay):
+                break
+            self.reconnects += 1
+            delay = min(delay * 2, 30.0)
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+            day = date.fromisoformat(event['appointment_date'])
+        except (ValueError, KeyError, TypeError):
+            logging.warning(f"Ignoring malformed appointment event: {payload[:200]}")
+            return
+        self.received += 1
+        slot_cache.invalidate(event['doctor_id'], day)
+        agenda_store.discard_if_stale(event['doctor_id'], day, event['id'], event['version'])
+
+        with self._lock:
+            subscribers = list(self._by_doctor.get(event['doctor_id'], ()))
+        for subscription in subscribers:
+            if self._offer(subscription, event):
+                self.delivered += 1
+
+    def _offer(self, subscription, item):
+        try:
+            subscription.events.put_nowait(item)
+            return True
+        except queue.Full:
+            # The client stopped reading; its stream ends with a resync
+            subscription.overflowed = True
+            self.dropped += 1
+            return False
+
+    def _broadcast(self, item):
+        with self._lock:
+            subscribers = {s for subs in self._by_doctor.values() for s in subs}
+        for subscription in subscribers:
+            self._offer(subscription, item)
+
+    def subscribe(self, doctor_ids):
+        if self._closing:
+            raise EventsBusyError("Server is shutting down")
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise EventsBusyError("Too many event subscribers")
+            subscription = Subscription(doctor_ids, self.max_queue)
+            for doctor_id in subscription.doctor_ids:
+                self._by_doctor.setdefault(doctor_id, set()).add(subscription)
+            self._count += 1
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for doctor_id in subscription.doctor_ids:
+                subs = self._by_doctor.get(doctor_id)
+                if subs is not None:
+                    subs.discard(subscription)
+                    if not subs:
+                        del self._by_doctor[doctor_id]
+            self._count -= 1
+
+    def close_subscribers(self):
+        """End every open stream (graceful shutdown) and refuse new ones"""
+        self._closing = True
+        self._broadcast(CLOSE)
+
+    def stop(self):
+        self.close_subscribers()
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5.0)
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "subscribers": self._count,
+            "max_subscribers": self.max_subscribers,
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+appointment_events = AppointmentEventHub(
+    enabled=os.environ.get('APPOINTMENT_EVENTS_ENABLED', '1') == '1',
+    max_subscribers=int(os.environ.get('SSE_MAX_SUBSCRIBERS', 32)),
+    max_queue=int(os.environ.get('SSE_MAX_QUEUE', 1000)),
+)
+
+
+def _start_listener():
+    appointment_events.start()
+
+
+def init_app(app):
+    """Start the listener in each serving process on its first request"""
+    if appointment_events.enabled:
+        app.before_request(_start_listener)
@@ -0,0 +1,225 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import logging
+import concurrent.futures
+from app.services.metrics import record_upstream, llm_stream_ttft
+
+
+class ChatBusyError(Exception):
+    """Raised when too many LLM requests are already in flight"""
+
+
+class ChatTimeoutError(Exception):
+    """Raised when an LLM request exceeds its deadline"""
+
+
+class AsyncChatWorker:
+    """Runs LLM calls on a dedicated asyncio event loop.
+
+    WSGI threads hand coroutines to the loop instead of making blocking
+    model calls. A semaphore bounds the number of in-flight LLM requests;
+    callers that can't get a slot within queue_timeout are rejected with
+    ChatBusyError so they release their worker quickly, and calls that run
+    past their timeout are cancelled on the loop.
+    """
+
+    def __init__(self, max_in_flight=16, timeout=30.0, queue_timeout=2.0):
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._failed = 0
+        self._streams = 0
+        self._ttft_total = 0.0
+        self._stream_time_total = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._thread = threading.Thread(target=self._run_loop, name='chat-async-worker', daemon=True)
+            self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _run(self, coro_factory, timeout, operation):
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise ChatBusyError("Too many chat requests in flight")
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            result = await asyncio.wait_for(coro_factory(), timeout)
+            self._completed += 1
+            outcome = 'ok'
+            return result
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            outcome = 'timeout'
+            raise ChatTimeoutError(f"LLM request exceeded {timeout:.1f}s")
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            record_upstream('gemini', operation, time.monotonic() - started, outcome)
+
+    def submit(self, coro_factory, timeout=None, operation='generate'):
+        """Schedule coro_factory() on the loop and return a concurrent Future"""
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        return asyncio.run_coroutine_threadsafe(self._run(coro_factory, timeout, operation), self._loop)
+
+    def call(self, coro_factory, timeout=None):
+        """Run coro_factory() on the loop and wait for its result"""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(coro_factory, timeout)
+        try:
+            # The loop enforces both deadlines; the grace period only guards against a stuck loop
+            return future.result(timeout + self.queue_timeout + 1.0)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise ChatTimeoutError(f"LLM request exceeded {timeout:.1f}s")
+
+    def stream(self, agen_factory, timeout=None):
+        """Iterate the async generator agen_factory() from a synchronous caller.
+
+        Items are handed over through a queue as the loop produces them. The
+        timeout bounds the whole stream; closing the iterator early cancels
+        the producer on the loop.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            async for item in agen_factory():
+                items.put(item)
+
+        future = self.submit(pump, timeout, operation='stream')
+        future.add_done_callback(lambda _: items.put(done))
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=timeout + self.queue_timeout + 1.0)
+                except queue.Empty:
+                    raise ChatTimeoutError(f"LLM stream exceeded {timeout:.1f}s")
+                if item is done:
+                    break
+                yield item
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def record_stream(self, ttft, total):
+        """Record time-to-first-token and total latency of a streamed reply"""
+        with self._lock:
+            self._streams += 1
+            self._ttft_total += ttft
+            self._stream_time_total += total
+        llm_stream_ttft.observe(ttft)
+
+    def stats(self):
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "timeouts": self._timeouts,
+            "rejected": self._rejected,
+            "failed": self._failed,
+            "streams": self._streams,
+            "stream_ttft_ms_avg": self._ttft_total / self._streams * 1000.0 if self._streams else 0.0,
+            "stream_total_ms_avg": self._stream_time_total / self._streams * 1000.0 if self._streams else 0.0,
+        }
+
+    def drain(self, timeout):
+        """Wait up to timeout seconds for queued and in-flight calls to finish; True if idle"""
+        deadline = time.monotonic() + timeout
+        while self._in_flight or self._waiting:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self, timeout=None):
+        """Stop the loop, cancelling any LLM calls still running"""
+        with self._lock:
+            if self._thread is None:
+                return
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        async def _cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(_cancel_all(), loop)
+        thread.join(timeout)
+        if thread.is_alive():
+            logging.warning("Chat async worker did not stop in time")
+        else:
+            loop.close()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_chat_worker():
+    """Return the process-wide chat worker, starting it on first use"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                worker = AsyncChatWorker(
+                    max_in_flight=int(os.environ.get('CHAT_MAX_IN_FLIGHT', 16)),
+                    timeout=float(os.environ.get('CHAT_TIMEOUT', 30)),
+                    queue_timeout=float(os.environ.get('CHAT_QUEUE_TIMEOUT', 2)),
+                )
+                worker.start()
+                _worker = worker
+    return _worker
+
+
+def shutdown_chat_worker(timeout=10.0):
+    """Drain and stop the process-wide worker, if it was ever started"""
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is None:
+        return
+    if not worker.drain(timeout):
+        logging.warning(f"Cancelling chat requests still running after {timeout:.1f}s")
+    worker.shutdown(timeout=5.0)
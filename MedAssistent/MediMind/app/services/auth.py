@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+# Changing it takes effect for new registrations immediately and for
+# existing doctors the next time they log in.
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+class AuthBusyError(Exception):
+    """Raised when the hashing queue is full"""
+
+
+class AuthTimeoutError(Exception):
+    """Raised when a hash does not finish within its deadline"""
+
+
+# Executed in the pool's processes; kept at module level so they pickle by name
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _hash_params(password_hash):
+    """The method part of a werkzeug hash ("scrypt:32768:8:1$salt$digest")"""
+    return password_hash.split('$', 1)[0]
+
+
+_method_params = {}
+
+
+def _configured_params(method):
+    # "scrypt" and "scrypt:32768:8:1" produce the same prefix; hashing once
+    # per process is the simplest way to normalize defaults werkzeug fills in
+    params = _method_params.get(method)
+    if params is None:
+        params = _method_params[method] = _hash_params(generate_password_hash('', method=method))
+    return params
+
+
+def _verify(password_hash, password, method):
+    """(matches, replacement hash or None); rehashes when the parameters are outdated"""
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if _hash_params(password_hash) == _configured_params(method):
+        return True, None
+    return True, generate_password_hash(password, method=method)
+
+
+class PasswordHasher:
+    """Runs password hashing in a dedicated process pool.
+
+    scrypt/pbkdf2 keep a core busy for tens of milliseconds per call; running
+    them in request threads lets a login burst take over the worker's CPU
+    and starve unrelated requests. Here at most `workers` processes hash at
+    once, at most `max_pending` hashes may be queued or running, and callers
+    beyond that get AuthBusyError immediately instead of piling up. With
+    workers=0 hashing runs in the calling thread (still bounded).
+
+    The pool is created on first use so gunicorn's preloading master never
+    owns it; processes are spawned rather than forked because the calling
+    process is already multi-threaded. Spawned processes re-import the
+    entry script as __mp_main__, so entry scripts must not create the app
+    when loaded under that name (see main.py) or must use a factory (serve.py).
+    """
+
+    def __init__(self, method=DEFAULT_HASH_METHOD, workers=1, max_pending=32, timeout=10.0,
+                 start_method='spawn'):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._rehashed = 0
+        self._time_total = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._executor
+
+    def _reset_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finished(self, started):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._time_total += time.monotonic() - started
+        self._slots.release()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise AuthBusyError("Too many password hashes queued")
+        with self._lock:
+            self._in_flight += 1
+        started = time.monotonic()
+
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._finished(started)
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._finished(started)
+            raise
+        # The slot is held until the process is done, not until the caller
+        # gives up, so abandoned hashes still count against the queue
+        future.add_done_callback(lambda _: self._finished(started))
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise AuthTimeoutError(f"Password hash exceeded {self.timeout:.1f}s")
+        except BrokenProcessPool:
+            # A hashing process died (e.g. OOM-killed); start a fresh pool next time
+            logging.error("Password hashing pool broke; recreating it")
+            self._reset_executor(executor)
+            raise
+
+    def hash_password(self, password):
+        return self._run(_hash, password, self.method)
+
+    def verify_password(self, password_hash, password):
+        """(matches, new_hash): new_hash is set when the stored hash used
+        different parameters and should replace it"""
+        matches, new_hash = self._run(_verify, password_hash, password, self.method)
+        if new_hash is not None:
+            with self._lock:
+                self._rehashed += 1
+        return matches, new_hash
+
+    def stats(self):
+        return {
+            "method": self.method,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "rehashed": self._rehashed,
+            "hash_ms_avg": self._time_total / self._completed * 1000.0 if self._completed else 0.0,
+        }
+
+    def shutdown(self):
+        """Stop the pool; queued hashes are cancelled, running ones finish"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """Return the process-wide hasher; its pool starts on the first hash"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher(
+                    method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+                    workers=int(os.environ.get('AUTH_HASH_WORKERS', 1)),
+                    max_pending=int(os.environ.get('AUTH_HASH_MAX_QUEUE', 32)),
+                    timeout=float(os.environ.get('AUTH_HASH_TIMEOUT', 10)),
+                    start_method=os.environ.get('AUTH_HASH_START_METHOD', 'spawn'),
+                )
+    return _hasher
+
+
+def shutdown_password_hasher():
+    global _hasher
+    with _hasher_lock:
+        hasher, _hasher = _hasher, None
+    if hasher is not None:
+        hasher.shutdown()
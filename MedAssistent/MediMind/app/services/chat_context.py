@@ -0,0 +1,163 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Rough chars-per-token ratio for English text; avoids a tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class _Session:
+    __slots__ = ('turns', 'stored', 'local', 'checked_at')
+
+    def __init__(self, turns, stored):
+        self.turns = turns
+        self.stored = stored  # chat_history rows the turns were loaded from
+        self.local = 0  # turns appended here since, possibly not written yet
+        self.checked_at = time.monotonic()  # last load, check or append
+
+
+class SessionHistoryCache:
+    """LRU cache of recent chat turns per session.
+
+    Holds the last max_turns (user_message, bot_response) pairs for up to
+    max_sessions sessions. New turns are written through with append(), so
+    an active conversation reads its turns from chat_history only on its
+    first miss.
+
+    The cache is per process and another worker may have answered part of
+    the conversation. An entry this process loaded, checked or appended to
+    within trust_window seconds is used as is; an older one is trusted only
+    after a row count check: if chat_history holds more rows for the
+    session than this process loaded or appended, the turns are reloaded.
+    """
+
+    def __init__(self, max_sessions=1000, max_turns=20, trust_window=60.0):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.trust_window = trust_window
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, session_id, loader, counter):
+        """
+        Return the turns of session_id. loader(session_id, max_turns) returns
+        (turns, total rows) and is called on a miss; counter(session_id)
+        returns the current row count and validates an entry older than
+        trust_window.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and time.monotonic() - session.checked_at < self.trust_window:
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+                return list(session.turns)
+            expected = session.stored + session.local if session is not None else None
+
+        if session is not None:
+            if counter(session_id) <= expected:
+                with self._lock:
+                    session.checked_at = time.monotonic()
+                    self._sessions.move_to_end(session_id)
+                    self.hits += 1
+                    return list(session.turns)
+            with self._lock:
+                self.stale += 1
+
+        with self._lock:
+            self.misses += 1
+        turns, stored = loader(session_id, self.max_turns)
+        turns = list(turns)[-self.max_turns:]
+        self._put(session_id, _Session(turns, stored))
+        return list(turns)
+
+    def start_session(self, session_id):
+        """Register a session known to have no history, so it never hits the DB"""
+        self._put(session_id, _Session([], 0))
+
+    def append(self, session_id, user_message, bot_response):
+        """Write-through of a new turn; sessions not in the cache are left to the next load"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            session.turns.append((user_message, bot_response))
+            del session.turns[:-self.max_turns]
+            session.local += 1
+            session.checked_at = time.monotonic()
+            self._sessions.move_to_end(session_id)
+
+    def _put(self, session_id, session):
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "hits": self.hits, "misses": self.misses,
+                    "stale": self.stale}
+
+
+def _summarize(turns, max_tokens):
+    """Cheap extractive summary of dropped turns: the first sentence of each user message"""
+    points = []
+    used = 0
+    for user_message, _ in turns:
+        point = user_message.strip().split('\n')[0].split('. ')[0][:200]
+        cost = estimate_tokens(point)
+        if used + cost > max_tokens:
+            break
+        points.append(point)
+        used += cost
+    if not points:
+        return None
+    return "Summary of earlier conversation. The user mentioned: " + "; ".join(points)
+
+
+def build_contents(turns, user_message, token_budget):
+    """Build multi-turn model contents that fit within token_budget.
+
+    The newest turns are kept verbatim; turns that don't fit are folded into
+    a short summary (taking at most a quarter of the budget) at the start of
+    the conversation.
+    """
+    budget = token_budget - estimate_tokens(user_message)
+    kept = []
+    for user_text, bot_text in reversed(turns):
+        cost = estimate_tokens(user_text) + estimate_tokens(bot_text)
+        if cost > budget:
+            break
+        kept.append((user_text, bot_text))
+        budget -= cost
+    kept.reverse()
+    dropped = turns[:len(turns) - len(kept)]
+
+    contents = []
+    if dropped:
+        summary = _summarize(dropped, min(budget, token_budget // 4))
+        if summary:
+            contents.append({'role': 'user', 'parts': [summary]})
+            contents.append({'role': 'model', 'parts': ["Understood."]})
+    for user_text, bot_text in kept:
+        contents.append({'role': 'user', 'parts': [user_text]})
+        contents.append({'role': 'model', 'parts': [bot_text]})
+    contents.append({'role': 'user', 'parts': [user_message]})
+    return contents
+
+
+history_cache = SessionHistoryCache(
+    max_sessions=int(os.environ.get('CHAT_HISTORY_CACHE_SESSIONS', 1000)),
+    max_turns=int(os.environ.get('CHAT_HISTORY_MAX_TURNS', 20)),
+    trust_window=float(os.environ.get('CHAT_HISTORY_TRUST_WINDOW', 60)),
+)
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('CHAT_CONTEXT_TOKEN_BUDGET', 2000))
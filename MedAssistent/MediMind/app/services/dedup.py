@@ -0,0 +1,94 @@
+import re
+import random
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_MASK = (1 << 64) - 1
+
+
+class NearDuplicateDetector:
+    """Clusters near-duplicate articles with MinHash signatures and LSH banding.
+
+    Each article is reduced to word shingles of its title and description.
+    A MinHash signature of num_perm values is split into bands; articles
+    that agree on a whole band become candidate pairs, and candidates whose
+    exact shingle Jaccard similarity reaches threshold are merged. Work is
+    roughly linear in the batch size, since only bucket-mates are compared.
+    """
+
+    def __init__(self, num_perm=24, bands=8, shingle_size=3, threshold=0.7, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        rng = random.Random(seed)
+        # XOR with random masks permutes the (already well-mixed) shingle hashes
+        # far more cheaply than a*h+b mod p with Python big ints
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def shingles(self, text):
+        words = _WORD_RE.findall(text.lower())
+        n = self.shingle_size
+        if len(words) <= n:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+    def signature(self, shingles):
+        hashes = [hash(s) & _MASK for s in shingles] or [0]
+        return [min(h ^ mask for h in hashes) for mask in self._masks]
+
+    def clusters(self, texts):
+        """Group indexes of texts into clusters of near-duplicates"""
+        shingle_sets = [self.shingles(t) for t in texts]
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = {}
+        for i, shingles in enumerate(shingle_sets):
+            sig = self.signature(shingles)
+            for band in range(self.bands):
+                key = (band, tuple(sig[band * self.rows:(band + 1) * self.rows]))
+                for j in buckets.setdefault(key, []):
+                    ri, rj = find(i), find(j)
+                    if ri == rj:
+                        continue
+                    a, b = shingle_sets[i], shingle_sets[j]
+                    if a and b and len(a & b) / len(a | b) >= self.threshold:
+                        parent[ri] = rj
+                buckets[key].append(i)
+
+        groups = {}
+        for i in range(len(texts)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+
+def _representative_key(article):
+    """Prefer articles with an image, a named author and the fullest description, then the earliest"""
+    return (
+        not article.get('urlToImage'),
+        article.get('author') in (None, '', 'Unknown'),
+        -len(article.get('description') or ''),
+        article.get('publishedAt') or '~',
+    )
+
+
+near_duplicates = NearDuplicateDetector()
+
+
+def dedupe_articles(articles, detector=near_duplicates):
+    """Keep the best article of each near-duplicate cluster, preserving input order"""
+    if len(articles) < 2:
+        return list(articles)
+    texts = [f"{a.get('title', '')} {a.get('description', '')}" for a in articles]
+    keep = set()
+    for cluster in detector.clusters(texts):
+        keep.add(min(cluster, key=lambda i: _representative_key(articles[i])))
+    return [a for i, a in enumerate(articles) if i in keep]
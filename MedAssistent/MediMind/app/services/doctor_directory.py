@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from app.db.connection import db_connection
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+class DoctorDirectory:
+    """In-process cache of the verified-doctor listing.
+
+    The snapshot is loaded once and served from memory. Specialization
+    filters use a sorted token index (prefix match on every query token),
+    and responses are kept pre-serialized together with their ETag.
+
+    invalidate() bumps the version so the next request reloads; writes in
+    this process call it directly. Changes made elsewhere (other workers,
+    manual verification in SQL) are picked up by a cheap fingerprint check
+    of the doctors table every revalidate_interval seconds.
+
+    The check and reload run outside the lock in one thread at a time;
+    meanwhile other requests keep serving the current snapshot (only the
+    very first load makes them wait).
+    """
+
+    def __init__(self, loader, fingerprint, revalidate_interval=30.0, max_payloads=256):
+        self._loader = loader
+        self._fingerprint = fingerprint
+        self.revalidate_interval = revalidate_interval
+        self.max_payloads = max_payloads
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        self._refreshing = False
+        self.version = 0
+        self._loaded_version = -1
+        self._checked_at = 0.0
+        self._current_fingerprint = None
+        self._doctors = []
+        self._token_index = []  # sorted (token, position in self._doctors)
+        self._payloads = OrderedDict()  # normalized query -> (etag, body)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def _refresh(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                stale = self._loaded_version != self.version
+                if not stale and now - self._checked_at < self.revalidate_interval:
+                    return
+                if not self._refreshing:
+                    break
+                if self._loaded_version >= 0:
+                    return  # another thread is refreshing; serve the current snapshot
+                self._refreshed.wait()
+            self._refreshing = True
+            version = self.version
+            current = self._current_fingerprint
+
+        try:
+            fingerprint = self._fingerprint()
+            if not stale and fingerprint == current:
+                with self._lock:
+                    self._checked_at = time.monotonic()
+                return
+            doctors = self._loader()
+            index = sorted(
+                (token, pos)
+                for pos, doc in enumerate(doctors)
+                for token in set(_tokens(doc['specialization']))
+            )
+            with self._lock:
+                self._doctors = doctors
+                self._token_index = index
+                self._payloads.clear()
+                self._current_fingerprint = fingerprint
+                self._loaded_version = version
+                self._checked_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._refreshed.notify_all()
+
+    def _prefix_positions(self, prefix):
+        start = bisect.bisect_left(self._token_index, (prefix,))
+        positions = set()
+        for token, pos in self._token_index[start:]:
+            if not token.startswith(prefix):
+                break
+            positions.add(pos)
+        return positions
+
+    def _filter_locked(self, query_tokens):
+        if not query_tokens:
+            return self._doctors
+        matches = None
+        for token in query_tokens:
+            positions = self._prefix_positions(token)
+            matches = positions if matches is None else matches & positions
+            if not matches:
+                return []
+        # Positions follow the loader's ORDER BY name
+        return [self._doctors[pos] for pos in sorted(matches)]
+
+    def payload(self, specialization=None):
+        """Return (etag, json_body) for the listing, optionally filtered"""
+        query_tokens = _tokens(specialization)
+        key = ' '.join(query_tokens)
+        self._refresh()
+        with self._lock:
+            cached = self._payloads.get(key)
+            if cached is not None:
+                self._payloads.move_to_end(key)
+                return cached
+
+            body = json.dumps({"doctors": self._filter_locked(query_tokens)}).encode('utf-8')
+            etag = hashlib.sha1(body).hexdigest()
+            self._payloads[key] = (etag, body)
+            while len(self._payloads) > self.max_payloads:
+                self._payloads.popitem(last=False)
+            return etag, body
+
+
+def _load_verified_doctors():
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('''
+                SELECT id, name, specialization, bio, experience_years, consultation_fee
+                FROM doctors WHERE is_verified = TRUE
+                ORDER BY name
+            ''')
+            doctors = cur.fetchall()
+    return [
+        {
+            "id": doc['id'],
+            "name": doc['name'],
+            "specialization": doc['specialization'],
+            "bio": doc['bio'],
+            "experience_years": doc['experience_years'],
+            "consultation_fee": float(doc['consultation_fee']) if doc['consultation_fee'] else 0.00
+        }
+        for doc in doctors
+    ]
+
+
+def _verified_doctors_fingerprint():
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('''
+                SELECT COUNT(*) AS count, MAX(updated_at) AS updated_at
+                FROM doctors WHERE is_verified = TRUE
+            ''')
+            row = cur.fetchone()
+    return row['count'], row['updated_at']
+
+
+doctor_directory = DoctorDirectory(
+    _load_verified_doctors,
+    _verified_doctors_fingerprint,
+    revalidate_interval=float(os.environ.get('DOCTOR_DIRECTORY_REVALIDATE_INTERVAL', 30)),
+)
@@ -0,0 +1,143 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prompts')
+
+# Model backend used by the chat blueprint: "gemini" (default) or "fake"
+CHAT_MODEL_BACKEND = os.environ.get('CHAT_MODEL_BACKEND', 'gemini').lower()
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamResponse:
+    """Async iterable of chunks, spreading the latency across them"""
+
+    def __init__(self, text, latency, chunk_words=3):
+        words = text.split(' ')
+        self._chunks = [' '.join(words[i:i + chunk_words]) + ' ' for i in range(0, len(words), chunk_words)]
+        self._delay = latency / max(1, len(self._chunks))
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    """Local stand-in for genai.GenerativeModel with tunable latency.
+
+    Used to benchmark the chat pipeline offline; responses are deterministic
+    for a given prompt so caches and history behave like they would with
+    the real model.
+    """
+
+    def __init__(self, model_name='fake', system_instruction=None, generation_config=None, latency=None):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.generation_config = generation_config
+        self.latency = float(os.environ.get('CHAT_FAKE_LATENCY', 1.0)) if latency is None else latency
+
+    def _reply(self, contents):
+        digest = hashlib.sha1(str(contents).encode('utf-8')).hexdigest()[:8]
+        return FakeResponse(
+            f"Thank you for sharing that. (fake response {digest}) "
+            "If your symptoms worsen, please see a doctor."
+        )
+
+    def generate_content(self, contents, generation_config=None):
+        time.sleep(self.latency)
+        return self._reply(contents)
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False):
+        if stream:
+            return FakeStreamResponse(self._reply(contents).text, self.latency)
+        await asyncio.sleep(self.latency)
+        return self._reply(contents)
+
+
+_gemini_configured = False
+
+
+def _configure_gemini(genai):
+    global _gemini_configured
+    if not _gemini_configured:
+        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+        _gemini_configured = True
+
+
+def create_model(model_name, system_instruction, generation_config=None):
+    """Build the configured model backend"""
+    if CHAT_MODEL_BACKEND == 'fake':
+        return FakeGenerativeModel(model_name=model_name, system_instruction=system_instruction,
+                                   generation_config=generation_config)
+
+    import google.generativeai as genai
+    _configure_gemini(genai)
+    return genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction,
+                                 generation_config=generation_config)
+
+
+def load_prompt(name, version):
+    """Read a versioned prompt template, e.g. app/prompts/medimind_system_v1.txt"""
+    path = os.path.join(PROMPTS_DIR, f"{name}_{version}.txt")
+    with open(path, encoding='utf-8') as f:
+        return f.read().strip()
+
+
+class ModelRegistry:
+    """Process-wide cache of model instances.
+
+    Models are keyed by backend, model name, system prompt and generation
+    config, so handlers reuse one wrapper per configuration instead of
+    rebuilding it on every request.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_name, system_instruction, generation_config):
+        # str hashes are cached, so keying on the prompt itself is cheap
+        config = tuple(sorted(generation_config.items())) if generation_config else ()
+        return (CHAT_MODEL_BACKEND, model_name, system_instruction, config)
+
+    def get(self, model_name, system_instruction, generation_config=None):
+        key = self._key(model_name, system_instruction, generation_config)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = create_model(model_name, system_instruction, generation_config)
+                    self._models[key] = model
+        return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self):
+        return len(self._models)
+
+
+model_registry = ModelRegistry()
+
+
+def backend_configured():
+    """Whether the configured backend has the credentials it needs"""
+    return CHAT_MODEL_BACKEND == 'fake' or bool(os.environ.get("GEMINI_API_KEY"))
+
+
+async def stream_text(model, contents, generation_config=None):
+    """Yield response text chunks as the model produces them"""
+    response = await model.generate_content_async(contents, generation_config=generation_config, stream=True)
+    async for chunk in response:
+        if chunk.text:
+            yield chunk.text
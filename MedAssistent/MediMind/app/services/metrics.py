@@ -0,0 +1,214 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from flask import request
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+
+# Seconds; tuned for web handlers (sub-ms cache hits up to multi-second LLM calls)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, ('le', _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    def __init__(self, name, help, callback):
+        self.name = name
+        self.help = help
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            logging.warning(f"Gauge {self.name} failed: {e}")
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    'medimind_http_request_duration_seconds', 'Time to produce the response (headers for streams)',
+    ('method', 'endpoint', 'status')))
+db_queries_per_request = registry.register(Histogram(
+    'medimind_db_queries_per_request', 'Database statements executed per request',
+    ('endpoint',), buckets=QUERY_COUNT_BUCKETS))
+db_query_duration = registry.register(Histogram(
+    'medimind_db_query_duration_seconds', 'Duration of individual database statements', ('endpoint',)))
+db_slow_queries = registry.register(Counter(
+    'medimind_db_slow_queries_total', 'Statements slower than SLOW_QUERY_MS', ('endpoint',)))
+upstream_duration = registry.register(Histogram(
+    'medimind_upstream_request_duration_seconds', 'Calls to Gemini and NewsAPI, including retries',
+    ('upstream', 'operation', 'outcome')))
+llm_stream_ttft = registry.register(Histogram(
+    'medimind_llm_stream_ttft_seconds', 'Time to first streamed chat token'))
+
+# Per-thread accounting for the request being served; threads that are not
+# serving a request (background writers, refreshers) leave it unset
+_local = threading.local()
+
+
+def _query_text(query, cursor):
+    if isinstance(query, bytes):
+        # Already interpolated (execute_values); drop the literal rows
+        return query.decode('utf-8', 'replace').split(' VALUES ', 1)[0] + ' VALUES ...'
+    if hasattr(query, 'as_string'):  # psycopg2.sql.Composable
+        return query.as_string(cursor)
+    return str(query)
+
+
+def record_query(elapsed, query, cursor=None):
+    """Called by the instrumented cursor after every statement"""
+    if not METRICS_ENABLED:
+        return
+    endpoint = getattr(_local, 'endpoint', 'background')
+    if endpoint != 'background':
+        _local.queries += 1
+    db_query_duration.observe(elapsed, (endpoint,))
+    if elapsed * 1000.0 >= SLOW_QUERY_MS:
+        db_slow_queries.inc((endpoint,))
+        # Statement text only; parameters may hold patient data
+        text = ' '.join(_query_text(query, cursor).split())
+        logging.warning(f"Slow query ({elapsed * 1000.0:.1f}ms, {endpoint}): {text[:500]}")
+
+
+def record_upstream(upstream, operation, elapsed, outcome):
+    if METRICS_ENABLED:
+        upstream_duration.observe(elapsed, (upstream, operation, outcome))
+
+
+def _start_request():
+    _local.endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    _local.queries = 0
+    _local.started = time.perf_counter()
+
+
+def _observe_request(status_code):
+    started = getattr(_local, 'started', None)
+    if started is None:
+        return
+    endpoint = _local.endpoint
+    http_request_duration.observe(time.perf_counter() - started, (request.method, endpoint, str(status_code)))
+    db_queries_per_request.observe(_local.queries, (endpoint,))
+    _local.started = None
+    _local.endpoint = 'background'
+
+
+def _finish_request(response):
+    _observe_request(response.status_code)
+    return response
+
+
+def _abort_request(exc=None):
+    # Normally a no-op: after_request has already recorded the request
+    _observe_request(500)
+
+
+def init_app(app):
+    """Time every request and expose /metrics in the Prometheus text format"""
+    if METRICS_ENABLED:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        app.teardown_request(_abort_request)
+
+    @app.route('/metrics')
+    def metrics():
+        return registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
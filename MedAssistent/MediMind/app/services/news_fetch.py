@@ -0,0 +1,134 @@
+import os
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.services.metrics import record_upstream
+
+FETCH_DEADLINE = float(os.environ.get('NEWS_FETCH_DEADLINE', 8))
+FETCH_RETRIES = int(os.environ.get('NEWS_FETCH_RETRIES', 2))
+FETCH_BACKOFF = float(os.environ.get('NEWS_FETCH_BACKOFF', 0.25))
+
+# Status codes worth retrying; anything else is returned as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='news-fetch')
+
+
+def get_session():
+    """Shared keep-alive session so upstream calls reuse TCP/TLS connections"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class UpstreamStats:
+    """Per-upstream call counts and timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, elapsed, ok, attempts):
+        with self._lock:
+            s = self._stats.setdefault(name, {
+                "calls": 0, "failures": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0
+            })
+            ms = elapsed * 1000.0
+            s["calls"] += 1
+            s["failures"] += 0 if ok else 1
+            s["retries"] += attempts - 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+            s["last_ms"] = ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(s, avg_ms=s["total_ms"] / s["calls"] if s["calls"] else 0.0)
+                for name, s in self._stats.items()
+            }
+
+
+upstream_stats = UpstreamStats()
+
+
+def get_with_retry(name, url, params, deadline):
+    """GET url, retrying transient failures with exponential backoff until the deadline.
+
+    Returns the decoded JSON body, or None if the upstream failed.
+    """
+    session = get_session()
+    started = time.monotonic()
+    attempt = 0
+    ok = False
+    try:
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.warning(f"{name}: deadline exhausted after {attempt - 1} attempts")
+                return None
+            try:
+                response = session.get(url, params=params, timeout=remaining)
+                if response.status_code == 200:
+                    ok = True
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES:
+                    logging.warning(f"{name}: upstream returned {response.status_code}")
+                    return None
+                error = f"status {response.status_code}"
+            except requests.RequestException as e:
+                error = e
+
+            if attempt > FETCH_RETRIES:
+                logging.warning(f"{name}: giving up after {attempt} attempts: {error}")
+                return None
+            backoff = FETCH_BACKOFF * (2 ** (attempt - 1))
+            if time.monotonic() + backoff >= deadline:
+                logging.warning(f"{name}: no time left to retry: {error}")
+                return None
+            time.sleep(backoff)
+    finally:
+        elapsed = time.monotonic() - started
+        upstream_stats.record(name, elapsed, ok, attempt)
+        record_upstream('newsapi', name, elapsed, 'ok' if ok else 'error')
+
+
+def fetch_all(calls, deadline_budget=None):
+    """Run {name: (url, params)} upstream calls concurrently.
+
+    Returns {name: json_or_None}. Calls still running when the deadline
+    budget is spent are reported as None, so one slow upstream only
+    costs its share of results rather than the whole response.
+    """
+    budget = FETCH_DEADLINE if deadline_budget is None else deadline_budget
+    deadline = time.monotonic() + budget
+    futures = {
+        name: _executor.submit(get_with_retry, name, url, params, deadline)
+        for name, (url, params) in calls.items()
+    }
+    wait(futures.values(), timeout=budget)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done() and not future.exception():
+            results[name] = future.result()
+        else:
+            if not future.done():
+                logging.warning(f"{name}: no response within {budget:.1f}s, returning partial results")
+            else:
+                logging.warning(f"{name}: failed: {future.exception()}")
+            results[name] = None
+    return results
@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from app.services.news_fetch import fetch_all, upstream_stats
+from app.services.relevance import medical_relevance
+from app.services.dedup import dedupe_articles
+
+NEWS_API_BASE_URL = os.environ.get('NEWS_API_BASE_URL', 'https://newsapi.org/v2').rstrip('/')
+
+# Articles kept per country; requests are served a prefix of this
+INGEST_SIZE = 100
+
+# Countries NewsAPI's top-headlines endpoint supports; NEWS_COUNTRIES
+# (comma-separated codes) narrows the set. Every country served costs two
+# upstream calls per refresh interval, so clients can't add their own.
+NEWSAPI_COUNTRIES = frozenset(
+    'ae ar at au be bg br ca ch cn co cu cz de eg fr gb gr hk hu id ie il in it jp kr lt lv ma '
+    'mx my ng nl no nz ph pl pt ro rs ru sa se sg si sk th tr tw ua us ve za'.split()
+)
+
+
+def _supported_countries():
+    configured = os.environ.get('NEWS_COUNTRIES')
+    if not configured:
+        return NEWSAPI_COUNTRIES
+    return frozenset(c.strip().lower() for c in configured.split(',')) & NEWSAPI_COUNTRIES
+
+
+SUPPORTED_COUNTRIES = _supported_countries()
+
+
+def fetch_articles(api_key, country):
+    """Fetch raw articles from the health headlines and research endpoints concurrently"""
+    results = fetch_all({
+        # 1. Health category news
+        'top-headlines': (f"{NEWS_API_BASE_URL}/top-headlines", {
+            'apiKey': api_key,
+            'category': 'health',
+            'country': country,
+            'pageSize': INGEST_SIZE
+        }),
+        # 2. Medical research and clinical news
+        'everything': (f"{NEWS_API_BASE_URL}/everything", {
+            'apiKey': api_key,
+            'q': 'medical research OR clinical trial OR health study',
+            'language': 'en',
+            'sortBy': 'publishedAt',
+            'pageSize': INGEST_SIZE,
+            'from': (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        }),
+    })
+
+    news_articles = []
+    for name in ('top-headlines', 'everything'):
+        data = results.get(name)
+        if data and 'articles' in data:
+            news_articles.extend(data['articles'])
+    return news_articles
+
+
+def filter_articles(news_articles):
+    """Drop duplicate, near-duplicate, low-quality and non-medical articles; newest first"""
+    seen_urls = set()
+    filtered_articles = []
+
+    for article in news_articles:
+        if not article or not article.get('url') or article['url'] in seen_urls:
+            continue
+
+        # Basic quality filters
+        if (not article.get('title') or
+                not article.get('description') or
+                len(article.get('description', '')) < 50):
+            continue
+
+        # Check if article is medically relevant (weighted keyword score)
+        if medical_relevance.is_relevant(article['title'], article['description']):
+            seen_urls.add(article['url'])
+
+            # Clean and format article data
+            filtered_articles.append({
+                'title': article.get('title', '').strip(),
+                'description': article.get('description', '').strip(),
+                'url': article.get('url'),
+                'urlToImage': article.get('urlToImage'),
+                'publishedAt': article.get('publishedAt'),
+                'source': {
+                    'name': (article.get('source') or {}).get('name', 'Unknown')
+                },
+                'author': article.get('author') or 'Unknown'
+            })
+
+    # Collapse the same story syndicated under different URLs
+    filtered_articles = dedupe_articles(filtered_articles)
+
+    # Sort by publication date (newest first)
+    filtered_articles.sort(key=lambda x: x.get('publishedAt') or '', reverse=True)
+    return filtered_articles
+
+
+class NewsStore:
+    """Locally cached, pre-filtered medical news per country.
+
+    A background thread refreshes every known country each refresh_interval
+    seconds. Reads never wait on NewsAPI once a country has data: stale
+    snapshots are served while a refresh runs (stale-while-revalidate).
+    Only the very first read for a country blocks, for at most
+    first_fetch_timeout seconds. A country nobody has asked for in
+    country_ttl seconds is dropped and no longer refreshed. A refresh that
+    fails or comes back empty (e.g. NewsAPI answering 429 over quota) is not
+    retried for retry_backoff seconds, doubling per consecutive failure up
+    to refresh_interval; reads keep getting the previous snapshot. When
+    snapshot_path is set, the store is persisted to disk after each refresh
+    and reloaded on startup.
+    """
+
+    def __init__(self, refresh_interval=300.0, first_fetch_timeout=15.0, country_ttl=3600.0,
+                 retry_backoff=60.0, snapshot_path=None):
+        self.refresh_interval = refresh_interval
+        self.first_fetch_timeout = first_fetch_timeout
+        self.country_ttl = country_ttl
+        self.retry_backoff = retry_backoff
+        self._retry = {}  # country -> (epoch seconds of the next allowed refresh, consecutive failures)
+        self.snapshot_path = snapshot_path
+        self._entries = {}  # country -> {"articles": [...], "fetched_at": epoch seconds}
+        self._requested = {}  # country -> monotonic time of the last get()
+        self._refreshing = {}  # country -> threading.Event set when the refresh finishes
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+        self.failures = 0
+        if snapshot_path:
+            self._load_snapshot()
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                entries = json.load(f)
+            self._entries = {c: e for c, e in entries.items() if c in SUPPORTED_COUNTRIES}
+            # Restored countries get one TTL to be asked for again
+            now = time.monotonic()
+            self._requested = {c: now for c in self._entries}
+            logging.info(f"Loaded news snapshot with {len(self._entries)} countries")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable news snapshot {self.snapshot_path}: {e}")
+
+    def _save_snapshot(self):
+        with self._lock:
+            data = json.dumps(self._entries)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logging.warning(f"Failed to write news snapshot: {e}")
+
+    def refresh(self, country):
+        """Fetch, filter and store articles for one country"""
+        api_key = os.environ.get('NEWS_API_KEY')
+        if not api_key:
+            return
+        try:
+            articles = filter_articles(fetch_articles(api_key, country))
+            # Keep serving the previous snapshot if the upstream returned nothing
+            if articles or country not in self._entries:
+                with self._lock:
+                    self._entries[country] = {"articles": articles, "fetched_at": time.time()}
+                    self._retry.pop(country, None)
+            else:
+                self._back_off(country)
+            self.refreshes += 1
+            if self.snapshot_path:
+                self._save_snapshot()
+        except Exception as e:
+            self.failures += 1
+            self._back_off(country)
+            logging.error(f"News refresh failed for {country}: {e}")
+        finally:
+            with self._lock:
+                done = self._refreshing.pop(country, None)
+            if done:
+                done.set()
+
+    def _back_off(self, country):
+        with self._lock:
+            _, failures = self._retry.get(country, (0.0, 0))
+            delay = min(self.retry_backoff * 2 ** failures, max(self.refresh_interval, self.retry_backoff))
+            self._retry[country] = (time.time() + delay, failures + 1)
+
+    def _due(self, country):
+        """Whether a refresh may run now, i.e. the country is not backing off"""
+        with self._lock:
+            retry = self._retry.get(country)
+        return retry is None or time.time() >= retry[0]
+
+    def _refresh_async(self, country):
+        """Start a refresh unless one is already running; returns its completion event"""
+        with self._lock:
+            done = self._refreshing.get(country)
+            if done is not None:
+                return done
+            done = self._refreshing[country] = threading.Event()
+        threading.Thread(target=self.refresh, args=(country,), name=f'news-refresh-{country}', daemon=True).start()
+        return done
+
+    def get(self, country):
+        """Return (articles, fetched_at, stale) for a country, or None if nothing could be fetched"""
+        self.start()
+        with self._lock:
+            self._requested[country] = time.monotonic()
+            entry = self._entries.get(country)
+
+        if entry is None:
+            if not self._due(country):
+                return None
+            self._refresh_async(country).wait(self.first_fetch_timeout)
+            with self._lock:
+                entry = self._entries.get(country)
+            if entry is None:
+                return None
+
+        stale = time.time() - entry['fetched_at'] > self.refresh_interval
+        if stale and self._due(country):
+            self._refresh_async(country)
+        return entry['articles'], entry['fetched_at'], stale
+
+    def start(self):
+        """Start the periodic refresher (idempotent)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='news-refresher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            self._evict_unrequested()
+            with self._lock:
+                countries = list(self._entries)
+            for country in countries:
+                if self._due(country):
+                    self._refresh_async(country).wait()
+
+    def _evict_unrequested(self):
+        cutoff = time.monotonic() - self.country_ttl
+        with self._lock:
+            idle = [c for c, at in self._requested.items() if at < cutoff]
+            for country in idle:
+                del self._requested[country]
+                self._entries.pop(country, None)
+                self._retry.pop(country, None)
+        if idle:
+            logging.info(f"Stopped refreshing news for {', '.join(sorted(idle))}")
+            if self.snapshot_path:
+                self._save_snapshot()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "countries": {c: {"articles": len(e["articles"]), "age_s": round(time.time() - e["fetched_at"], 1)}
+                              for c, e in self._entries.items()},
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "upstreams": upstream_stats.snapshot(),
+            }
+
+
+news_store = NewsStore(
+    refresh_interval=float(os.environ.get('NEWS_REFRESH_INTERVAL', 300)),
+    first_fetch_timeout=float(os.environ.get('NEWS_FIRST_FETCH_TIMEOUT', 15)),
+    country_ttl=float(os.environ.get('NEWS_COUNTRY_TTL', 3600)),
+    retry_backoff=float(os.environ.get('NEWS_RETRY_BACKOFF', 60)),
+    snapshot_path=os.environ.get('NEWS_SNAPSHOT_PATH') or None,
+)
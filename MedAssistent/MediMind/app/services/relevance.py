@@ -0,0 +1,68 @@
+import re
+
+# Keyword weights: strong medical terms count more than generic ones such as
+# "study" or "research" that also show up in unrelated news.
+MEDICAL_KEYWORD_WEIGHTS = {
+    'medical': 2.0, 'clinical': 2.0, 'medicine': 2.0, 'healthcare': 2.0,
+    'pharmaceutical': 2.0, 'disease': 2.0, 'diagnosis': 2.0,
+    'patient': 1.5, 'doctor': 1.5, 'hospital': 1.5, 'therapy': 1.5, 'treatment': 1.5,
+    'health': 1.0, 'drug': 1.0, 'prevention': 1.0,
+    'research': 0.5, 'study': 0.5,
+}
+
+# Inflections that don't follow the plain "+s"/"+es" rule
+IRREGULAR_FORMS = {
+    'study': ['studies'],
+    'therapy': ['therapies'],
+    'diagnosis': ['diagnoses'],
+}
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class RelevanceScorer:
+    """Weighted keyword relevance in a single pass over each text.
+
+    The text is split into words once by a compiled regex and every word
+    (and, for multi-word keywords, every n-gram) is looked up in a hash
+    table of keyword forms, so matching is whole-word and its cost depends
+    on the text length, not on the number of keywords. A keyword counts
+    once per field; matches in the title are weighted by title_weight.
+    """
+
+    def __init__(self, weights, irregular_forms=None, title_weight=2.0, threshold=1.0):
+        self.weights = dict(weights)
+        self.title_weight = title_weight
+        self.threshold = threshold
+        self._forms = {}
+        for keyword in self.weights:
+            for form in [keyword, keyword + 's', keyword + 'es'] + (irregular_forms or {}).get(keyword, []):
+                self._forms[' '.join(_WORD_RE.findall(form.lower()))] = keyword
+        self._max_words = max((form.count(' ') + 1 for form in self._forms), default=1)
+
+    def keywords(self, text):
+        """Distinct keywords found in text"""
+        if not text:
+            return set()
+        forms = self._forms
+        words = _WORD_RE.findall(text.lower())
+        found = {forms[w] for w in words if w in forms}
+        for n in range(2, self._max_words + 1):
+            for i in range(len(words) - n + 1):
+                phrase = ' '.join(words[i:i + n])
+                if phrase in forms:
+                    found.add(forms[phrase])
+        return found
+
+    def score(self, title, description=''):
+        weights = self.weights
+        title_score = sum(weights[k] for k in self.keywords(title))
+        desc_score = sum(weights[k] for k in self.keywords(description))
+        return title_score * self.title_weight + desc_score
+
+    def is_relevant(self, title, description=''):
+        return self.score(title, description) >= self.threshold
+
+
+medical_relevance = RelevanceScorer(MEDICAL_KEYWORD_WEIGHTS, IRREGULAR_FORMS)
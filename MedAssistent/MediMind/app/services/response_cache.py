@@ -0,0 +1,142 @@
+import os
+import re
+import math
+import time
+import threading
+from collections import OrderedDict, Counter
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _SPACE_RE.sub(' ', _PUNCT_RE.sub(' ', text.lower())).strip()
+
+
+def _vectorize(text):
+    """Sparse unit vector of word and character-trigram counts"""
+    features = Counter(text.split())
+    padded = f" {text} "
+    features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {k: v / norm for k, v in features.items()}
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class ResponseCache:
+    """TTL + LRU cache of model responses.
+
+    The exact tier is keyed on the normalized conversation text. First-turn
+    messages can additionally be matched against recent first-turn entries
+    by cosine similarity of word/trigram vectors (similarity tier), which is
+    disabled when similarity_threshold is 0.
+    """
+
+    def __init__(self, max_entries=1000, ttl=3600.0, similarity_threshold=0.0, similarity_max_entries=500):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.similarity_max_entries = similarity_max_entries
+        self._entries = OrderedDict()   # key -> (response, expires_at)
+        self._vectors = OrderedDict()   # key -> vector, first-turn entries only
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def key(namespace, messages):
+        return namespace + '\x00' + '\x01'.join(normalize(m) for m in messages)
+
+    def _evict_locked(self, key):
+        self._entries.pop(key, None)
+        self._vectors.pop(key, None)
+
+    def get(self, namespace, messages):
+        """Look up the response for a conversation given as a list of message texts"""
+        key = self.key(namespace, messages)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._evict_locked(key)
+
+            if self.similarity_threshold and len(messages) == 1 and self._vectors:
+                match = self._find_similar_locked(namespace, messages[0], now)
+                if match is not None:
+                    self.similar_hits += 1
+                    return match
+
+            self.misses += 1
+            return None
+
+    def _find_similar_locked(self, namespace, message, now):
+        vector = _vectorize(normalize(message))
+        prefix = namespace + '\x00'
+        best_key, best_score = None, self.similarity_threshold
+        for key, other in self._vectors.items():
+            if not key.startswith(prefix):
+                continue
+            score = _cosine(vector, other)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        response, expires_at = self._entries[best_key]
+        if expires_at <= now:
+            self._evict_locked(best_key)
+            return None
+        self._entries.move_to_end(best_key)
+        return response
+
+    def put(self, namespace, messages, response):
+        key = self.key(namespace, messages)
+        with self._lock:
+            self._entries[key] = (response, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            if self.similarity_threshold and len(messages) == 1:
+                self._vectors[key] = _vectorize(normalize(messages[0]))
+                self._vectors.move_to_end(key)
+                while len(self._vectors) > self.similarity_max_entries:
+                    self._vectors.popitem(last=False)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._vectors.pop(old_key, None)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('CHAT_CACHE_MAX_ENTRIES', 1000)),
+    ttl=float(os.environ.get('CHAT_CACHE_TTL', 3600)),
+    similarity_threshold=float(os.environ.get('CHAT_CACHE_SIMILARITY_THRESHOLD', 0)),
+    similarity_max_entries=int(os.environ.get('CHAT_CACHE_SIMILARITY_MAX_ENTRIES', 500)),
+)
@@ -0,0 +1,182 @@
+import os
+import time
+import threading
+from datetime import timedelta, time as dtime
+from collections import OrderedDict
+
+SLOT_MINUTES = int(os.environ.get('SLOT_MINUTES', 30))
+
+# Expand weekly availability (day_of_week uses PostgreSQL DOW: 0 = Sunday)
+# into slot start times on a SLOT_MINUTES grid, minus active appointments,
+# in one statement for all requested doctors and days.
+FREE_SLOTS_SQL = '''
+    WITH days AS (
+        SELECT d::date AS day
+        FROM generate_series(%(from_date)s::date, %(to_date)s::date, INTERVAL '1 day') AS d
+    ),
+    slots AS (
+        SELECT av.doctor_id, days.day, s.slot_start
+        FROM doctor_availability av
+        JOIN doctors doc ON doc.id = av.doctor_id AND doc.is_verified = TRUE
+        JOIN days ON av.day_of_week = EXTRACT(DOW FROM days.day)
+        CROSS JOIN LATERAL generate_series(
+            days.day + make_interval(mins => (CEIL(EXTRACT(EPOCH FROM av.start_time) / 60.0 / %(slot)s) * %(slot)s)::int),
+            days.day + av.end_time - make_interval(mins => %(slot)s),
+            make_interval(mins => %(slot)s)
+        ) AS s(slot_start)
+        WHERE av.doctor_id = ANY(%(doctor_ids)s) AND av.is_available
+    )
+    SELECT DISTINCT s.doctor_id, s.day, s.slot_start::time AS slot_time
+    FROM slots s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM appointments a
+        WHERE a.doctor_id = s.doctor_id
+          AND a.appointment_date = s.day
+          AND a.status IN ('pending', 'confirmed')
+          AND a.appointment_date + a.appointment_time >= s.slot_start
+          AND a.appointment_date + a.appointment_time < s.slot_start + make_interval(mins => %(slot)s)
+    )
+'''
+
+
+def slot_index(value):
+    """Position of a time on the slot grid"""
+    return (value.hour * 60 + value.minute) // SLOT_MINUTES
+
+
+def slot_time(index):
+    minutes = index * SLOT_MINUTES
+    return dtime(minutes // 60, minutes % 60)
+
+
+def bitmap_times(bitmap):
+    """Slot start times set in a bitmap, in order"""
+    times = []
+    index = 0
+    while bitmap:
+        if bitmap & 1:
+            times.append(slot_time(index))
+        bitmap >>= 1
+        index += 1
+    return times
+
+
+class SlotCache:
+    """Per-doctor, per-day bitmaps of free slots.
+
+    Bit i is set when the slot starting at i * SLOT_MINUTES past midnight is
+    free. Entries are dropped when an appointment for that doctor and day is
+    booked or changes status, and expire after ttl seconds so availability
+    edits made directly in the database are picked up.
+
+    A fill races with bookings committed while its query runs, so callers
+    take sequence() before loading and put_many() skips keys invalidated
+    since (the same check AgendaStore makes).
+    """
+
+    def __init__(self, ttl=300.0, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (doctor_id, day) -> (bitmap, expires_at)
+        self._changed = OrderedDict()  # (doctor_id, day) -> change sequence number
+        self._sequence = 0
+        self._cleared = 0  # sequence number of the last clear()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """Return ({key: bitmap} for cached keys, [missing keys])"""
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def sequence(self):
+        with self._lock:
+            return self._sequence
+
+    def put_many(self, bitmaps, sequence):
+        """Cache bitmaps loaded after sequence(); keys invalidated since are left out"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if self._cleared > sequence:
+                return
+            for key, bitmap in bitmaps.items():
+                if self._changed.get(key, 0) > sequence:
+                    continue  # changed while loading; the next request reloads
+                self._entries[key] = (bitmap, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doctor_id, day):
+        key = (doctor_id, day)
+        with self._lock:
+            self._sequence += 1
+            self._changed[key] = self._sequence
+            self._changed.move_to_end(key)
+            while len(self._changed) > self.max_entries:
+                self._changed.popitem(last=False)
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._sequence += 1
+            self._cleared = self._sequence
+            self._changed.clear()
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+slot_cache = SlotCache(ttl=float(os.environ.get('SLOT_CACHE_TTL', 300)))
+
+
+def _load_bitmaps(conn, doctor_ids, from_date, to_date):
+    """Compute free-slot bitmaps for every doctor/day in the range with one query"""
+    bitmaps = {
+        (doctor_id, from_date + timedelta(days=offset)): 0
+        for doctor_id in doctor_ids
+        for offset in range((to_date - from_date).days + 1)
+    }
+    with conn.cursor() as cur:
+        cur.execute(FREE_SLOTS_SQL, {
+            'from_date': from_date,
+            'to_date': to_date,
+            'doctor_ids': list(doctor_ids),
+            'slot': SLOT_MINUTES,
+        })
+        for row in cur.fetchall():
+            key = (row['doctor_id'], row['day'])
+            bitmaps[key] |= 1 << slot_index(row['slot_time'])
+    return bitmaps
+
+
+def free_slots(conn, doctor_ids, from_date, to_date):
+    """Return {(doctor_id, day): bitmap} of free slots, filling cache misses in one query"""
+    keys = [
+        (doctor_id, from_date + timedelta(days=offset))
+        for doctor_id in doctor_ids
+        for offset in range((to_date - from_date).days + 1)
+    ]
+    found, missing = slot_cache.get_many(keys)
+    if missing:
+        missing_doctors = sorted({doctor_id for doctor_id, _ in missing})
+        missing_days = [day for _, day in missing]
+        sequence = slot_cache.sequence()
+        loaded = _load_bitmaps(conn, missing_doctors, min(missing_days), max(missing_days))
+        slot_cache.put_many(loaded, sequence)
+        for key in missing:
+            found[key] = loaded.get(key, 0)
+    return found
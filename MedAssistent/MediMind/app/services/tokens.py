@@ -0,0 +1,182 @@
+"""Signed, stateless doctor tokens.
+
+Login issues a short-lived access token and a longer-lived refresh token:
+
+    base64url(json claims) "." base64url(HMAC-SHA256(secret, claims part))
+
+Claims are {"sub": doctor id, "typ": "access" | "refresh", "exp", "jti"}.
+A before_request hook verifies `Authorization: Bearer <access token>` and
+sets g.doctor_id (None for a missing or invalid token), so authenticated requests cost one HMAC instead of a DB
+lookup and a password hash. Endpoints that act for a doctor use
+@doctor_required.
+
+Revocation (logout, refresh token rotation) is an in-memory set of token
+ids kept until the tokens expire. It is per process: with several gunicorn
+workers a revoked access token stays usable on the other workers until it
+expires, which ACCESS_TOKEN_TTL keeps short.
+"""
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+from functools import wraps
+from flask import g, request, jsonify
+
+ACCESS_TOKEN_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', 900))
+REFRESH_TOKEN_TTL = int(os.environ.get('REFRESH_TOKEN_TTL', 14 * 24 * 3600))
+
+
+class InvalidTokenError(Exception):
+    """Raised for malformed, forged, expired or revoked tokens"""
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class RevocationList:
+    """Revoked token ids, each forgotten once the token would have expired anyway"""
+
+    def __init__(self):
+        self._expiry = {}  # jti -> exp
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def revoke(self, jti, exp):
+        now = time.time()
+        with self._lock:
+            if exp > now:
+                self._expiry[jti] = exp
+            if now >= self._next_prune:
+                self._expiry = {j: e for j, e in self._expiry.items() if e > now}
+                self._next_prune = now + 60.0
+
+    def is_revoked(self, jti):
+        return jti in self._expiry
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+class TokenService:
+    def __init__(self, secret, access_ttl=ACCESS_TOKEN_TTL, refresh_ttl=REFRESH_TOKEN_TTL):
+        self._key = secret.encode('utf-8') if isinstance(secret, str) else secret
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.revoked = RevocationList()
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._key, payload, hashlib.sha256).digest()).encode('ascii')
+
+    def encode(self, claims):
+        payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+        return f"{payload}.{self._sign(payload.encode('ascii')).decode('ascii')}"
+
+    def decode(self, token, typ='access'):
+        """Verified claims of a token of the given type; raises InvalidTokenError"""
+        if not isinstance(token, str):
+            raise InvalidTokenError("Invalid token")
+        # Tokens are ASCII; anything else (or bad base64) is a forgery, not a server error
+        try:
+            payload, _, signature = token.encode('ascii').partition(b'.')
+            valid = bool(payload) and hmac.compare_digest(signature, self._sign(payload))
+            claims = json.loads(_b64decode(payload)) if valid else None
+        except ValueError:  # includes UnicodeError and binascii.Error
+            raise InvalidTokenError("Invalid token")
+        if not isinstance(claims, dict):
+            raise InvalidTokenError("Invalid token")
+        if claims.get('typ') != typ:
+            raise InvalidTokenError("Wrong token type")
+        exp = claims.get('exp')
+        if not isinstance(exp, (int, float)) or exp <= time.time():
+            raise InvalidTokenError("Token expired")
+        if self.revoked.is_revoked(claims.get('jti')):
+            raise InvalidTokenError("Token revoked")
+        return claims
+
+    def issue(self, doctor_id):
+        """New access/refresh pair, in the shape returned to clients"""
+        now = int(time.time())
+        access = {"sub": doctor_id, "typ": "access", "exp": now + self.access_ttl,
+                  "jti": secrets.token_urlsafe(12)}
+        refresh = {"sub": doctor_id, "typ": "refresh", "exp": now + self.refresh_ttl,
+                   "jti": secrets.token_urlsafe(12)}
+        return {
+            "access_token": self.encode(access),
+            "refresh_token": self.encode(refresh),
+            "token_type": "Bearer",
+            "expires_in": self.access_ttl,
+        }
+
+    def refresh(self, refresh_token):
+        """Rotate: revoke the presented refresh token and issue a new pair"""
+        claims = self.decode(refresh_token, typ='refresh')
+        self.revoked.revoke(claims['jti'], claims['exp'])
+        return self.issue(claims['sub'])
+
+    def revoke(self, token, typ):
+        """Revoke a token if it is valid; returns whether it was"""
+        try:
+            claims = self.decode(token, typ)
+        except InvalidTokenError:
+            return False
+        self.revoked.revoke(claims['jti'], claims['exp'])
+        return True
+
+
+_service = None
+
+
+def get_token_service():
+    return _service
+
+
+def _authenticate():
+    # An invalid token only leaves the request anonymous: public endpoints
+    # (and the refresh/login calls that replace an expired token) still work,
+    # and @doctor_required reports why the token was rejected
+    g.doctor_id = None
+    g.token_claims = None
+    g.token_error = None
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        claims = _service.decode(header[7:].strip())
+    except InvalidTokenError as e:
+        g.token_error = str(e)
+        return None
+    g.doctor_id = claims['sub']
+    g.token_claims = claims
+    return None
+
+
+def doctor_required(view):
+    """Reject the request with 401 unless it carries a valid access token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if g.get('doctor_id') is None:
+            if g.get('token_error'):
+                return jsonify({"error": f"{g.token_error}. Please log in again."}), 401
+            return jsonify({"error": "Authentication required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app):
+    """Create the token service and verify bearer tokens before every request"""
+    global _service
+    secret = os.environ.get('AUTH_TOKEN_SECRET') or app.secret_key
+    if secret == 'fallback_secret_key':
+        logging.warning("Signing doctor tokens with the fallback secret; set AUTH_TOKEN_SECRET or SESSION_SECRET")
+    _service = TokenService(secret)
+    app.before_request(_authenticate)
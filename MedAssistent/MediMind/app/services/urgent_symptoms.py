@@ -0,0 +1,33 @@
+import re
+
+# Symptoms the system prompt treats as urgent ("seek medical help right away").
+# Messages matching any of these always get a fresh model response.
+URGENT_PATTERNS = [
+    r"chest (pain|pressure|tightness)",
+    r"(difficulty|trouble|hard) breathing",
+    r"(short(ness)? of|can'?t catch my) breath",
+    r"can'?t breathe",
+    r"sudden (weakness|numbness|confusion|vision loss|severe headache)",
+    r"(face|facial) (droop|drooping)",
+    r"slurred speech",
+    r"stroke",
+    r"heart attack",
+    r"seizure",
+    r"(unconscious|passed out|fainted|unresponsive)",
+    r"(severe|heavy|uncontrolled) bleeding",
+    r"coughing (up )?blood",
+    r"vomiting blood",
+    r"suicid\w*",
+    r"(kill|hurt|harm) myself",
+    r"overdose",
+    r"anaphyla\w*",
+    r"(throat|tongue) (is )?swelling",
+    r"severe allergic reaction",
+]
+
+_URGENT_RE = re.compile(r"\b(?:" + "|".join(URGENT_PATTERNS) + r")", re.IGNORECASE)
+
+
+def is_urgent(message):
+    """Whether a message mentions an urgent symptom"""
+    return bool(_URGENT_RE.search(message or ''))
@@ -0,0 +1,92 @@
+"""Benchmark: a dashboard polling its week via /api/appointments vs
+/api/doctor/agenda.
+
+Runs the Flask app in-process against the configured database (PG*
+environment variables). A temporary doctor gets `per_day` appointments on
+each day of a far-future week. Each poll of the list endpoint pages
+through the week with the doctor JOIN and COUNT; each agenda poll reads the
+snapshot, with a status change between polls so the snapshot is kept
+current incrementally rather than reloaded. Run from the MediMind
+directory:
+
+    python -m bench.bench_agenda [polls] [per_day]
+"""
+import sys
+import json
+import time
+from datetime import date, timedelta
+
+import psycopg2.extras
+
+from app import create_app
+from app.db.connection import db_connection
+from app.services.agenda import agenda_store
+from app.services.tokens import get_token_service
+
+
+def main(polls=500, per_day=30):
+    app = create_app()
+    client = app.test_client()
+    monday = date.today() + timedelta(days=4000)
+    monday -= timedelta(days=monday.weekday())
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO doctors (name, email, password_hash, specialization, license_number, is_verified)
+                VALUES ('Bench Doctor', 'bench-agenda@example.com', '-', 'General Medicine', 'BENCH-AGENDA', TRUE)
+                ON CONFLICT (email) DO UPDATE SET is_verified = TRUE
+                RETURNING id
+            """)
+            doctor_id = cur.fetchone()['id']
+            ids = [row['id'] for row in psycopg2.extras.execute_values(cur, """
+                INSERT INTO appointments (patient_name, patient_email, doctor_id, appointment_date, appointment_time)
+                VALUES %s RETURNING id
+            """, [
+                (f"Bench Patient {i}", f"bench{i}@example.com", doctor_id, monday + timedelta(days=day),
+                 f"{8 + i // 4:02d}:{(i % 4) * 15:02d}")
+                for day in range(7) for i in range(per_day)
+            ], page_size=1000, fetch=True)]
+        conn.commit()
+
+    auth = {"Authorization": f"Bearer {get_token_service().issue(doctor_id)['access_token']}"}
+    list_url = (f"/api/appointments?doctor_id={doctor_id}&from_date={monday.isoformat()}"
+                f"&to_date={(monday + timedelta(days=6)).isoformat()}&per_page=100")
+    agenda_url = f"/api/doctor/agenda?date={monday.isoformat()}&view=week"
+    results = {"benchmark": "agenda", "polls": polls, "appointments": len(ids)}
+    try:
+        start = time.perf_counter()
+        for _ in range(polls):
+            page = 1
+            while True:
+                body = client.get(f"{list_url}&page={page}").get_json()
+                if page * 100 >= body["total"]:
+                    break
+                page += 1
+        results["list_poll_ms"] = round((time.perf_counter() - start) * 1000.0 / polls, 3)
+
+        client.get(agenda_url, headers=auth)  # load the snapshot
+        change_ms = 0.0
+        start = time.perf_counter()
+        for i in range(polls):
+            if i % 10 == 0:
+                # A notes-only update before every tenth poll
+                changed = time.perf_counter()
+                client.put(f"/api/appointments/{ids[i % len(ids)]}", json={"status": "pending", "notes": str(i)},
+                           headers=auth)
+                change_ms += time.perf_counter() - changed
+            client.get(agenda_url, headers=auth)
+        results["agenda_poll_ms"] = round(
+            ((time.perf_counter() - start) - change_ms) * 1000.0 / polls, 3)
+        results["agenda_store"] = agenda_store.stats()
+    finally:
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM doctors WHERE id = %s", (doctor_id,))
+            conn.commit()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 30)
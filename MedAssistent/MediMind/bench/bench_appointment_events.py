@@ -0,0 +1,163 @@
+"""Check and benchmark: appointment change events over SSE to many subscribers.
+
+Starts the app on a local threaded HTTP server against the configured
+database (PG* environment variables), opens `subscribers` concurrent
+/api/appointments/events streams spread over `doctors` temporary doctors,
+then books `bookings` appointments and confirms each through the API.
+Every subscriber must receive exactly the booked and status_changed events
+of its own doctor. The run reports delivery latency from the start of the
+API call to the event arriving at each subscriber. Run from the MediMind
+directory:
+
+    python -m bench.bench_appointment_events [subscribers] [doctors] [bookings]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+import requests
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def subscribe(base_url, doctor_id, ready, received, lock):
+    """Read one event stream until the server closes it; record (event, id, arrival)"""
+    events = []
+    with requests.get(f"{base_url}/api/appointments/events", params={"doctor_id": doctor_id},
+                      stream=True, timeout=(5, 120)) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: ') and event:
+                if event == 'ready':
+                    ready.release()
+                elif event in ('booked', 'status_changed'):
+                    data = json.loads(line[6:])
+                    events.append((event, data['doctor_id'], data['id'], time.perf_counter()))
+                event = None
+    with lock:
+        received.append((doctor_id, events))
+
+
+def main(subscribers=200, doctors=10, bookings=100):
+    # Every stream holds a server thread; allow all of them
+    os.environ['SSE_MAX_SUBSCRIBERS'] = str(subscribers)
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.db.connection import db_connection
+    from app.services.appointment_events import appointment_events
+    from app.services.tokens import get_token_service
+
+    app = create_app()
+    port = _free_port()
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM doctors WHERE email LIKE 'bench-events-%%'")
+            doctor_ids = []
+            for i in range(doctors):
+                cur.execute("""
+                    INSERT INTO doctors (name, email, password_hash, specialization, license_number, is_verified)
+                    VALUES (%s, %s, '-', 'General Medicine', %s, TRUE) RETURNING id
+                """, (f"Bench Doctor {i}", f"bench-events-{i}@example.com", f"BENCH-EVENTS-{i}"))
+                doctor_ids.append(cur.fetchone()['id'])
+        conn.commit()
+    tokens = {d: get_token_service().issue(d)['access_token'] for d in doctor_ids}
+
+    results = {"benchmark": "appointment_events", "subscribers": subscribers, "doctors": doctors,
+               "bookings": bookings}
+    ready = threading.Semaphore(0)
+    received, lock = [], threading.Lock()
+    threads = [threading.Thread(target=subscribe, args=(base_url, doctor_ids[i % doctors], ready, received, lock))
+               for i in range(subscribers)]
+    try:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for _ in range(subscribers):
+            if not ready.acquire(timeout=30):
+                raise RuntimeError("Subscribers did not connect in time")
+        results["connect_all_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+
+        # request start per (event, appointment id)
+        sent = {}
+        session = requests.Session()
+        day = date.today() + timedelta(days=5000)
+        expected = Counter()
+        for i in range(bookings):
+            doctor_id = doctor_ids[i % doctors]
+            minutes = 8 * 60 + (i // doctors) * 15
+            t0 = time.perf_counter()
+            response = session.post(f"{base_url}/api/book", json={
+                "patient_name": f"Bench Patient {i}", "patient_email": f"bench{i}@example.com",
+                "doctor_id": doctor_id, "appointment_date": day.isoformat(),
+                "appointment_time": f"{minutes // 60:02d}:{minutes % 60:02d}"})
+            response.raise_for_status()
+            appointment_id = response.json()['appointment_id']
+            sent[('booked', appointment_id)] = t0
+            t0 = time.perf_counter()
+            session.post(f"{base_url}/api/appointments/{appointment_id}/confirm", json={},
+                         headers={"Authorization": f"Bearer {tokens[doctor_id]}"}).raise_for_status()
+            sent[('status_changed', appointment_id)] = t0
+            expected[doctor_id] += 2
+        results["api_calls"] = len(sent)
+
+        # Let the last events drain, then end every stream from the server side
+        time.sleep(1.0)
+        appointment_events.close_subscribers()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        latencies, wrong_doctor, missing = [], 0, 0
+        for doctor_id, events in received:
+            wrong_doctor += sum(1 for _, d, _, _ in events if d != doctor_id)
+            missing += expected[doctor_id] - len(events)
+            latencies.extend((arrived - sent[(event, appointment_id)]) * 1000.0
+                             for event, _, appointment_id, arrived in events)
+        latencies.sort()
+        results.update({
+            "streams_finished": len(received),
+            "events_delivered": len(latencies),
+            "missing": missing,
+            "wrong_doctor": wrong_doctor,
+            "latency_ms_p50": round(percentile(latencies, 0.50), 2),
+            "latency_ms_p99": round(percentile(latencies, 0.99), 2),
+            "latency_ms_max": round(latencies[-1], 2) if latencies else 0.0,
+            "hub": appointment_events.stats(),
+        })
+        results["ok"] = len(received) == subscribers and missing == 0 and wrong_doctor == 0
+    finally:
+        server.shutdown()
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM doctors WHERE id = ANY(%s)", (doctor_ids,))
+            conn.commit()
+        appointment_events.stop()
+
+    print(json.dumps(results, indent=2))
+    return 0 if results.get("ok") else 1
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    sys.exit(main(*args))
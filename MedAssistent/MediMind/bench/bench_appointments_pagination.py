@@ -0,0 +1,142 @@
+"""Benchmark: OFFSET vs keyset pagination for /api/appointments queries.
+
+Seeds a synthetic appointments table (default 2,000,000 rows) in a scratch
+schema of the configured database (PG* environment variables), then times
+the listing queries at increasing page depths. Run from the MediMind
+directory:
+
+    python -m bench.bench_appointments_pagination [rows] [per_page]
+
+The scratch schema is dropped afterwards unless BENCH_KEEP_SCHEMA=1.
+"""
+import os
+import sys
+import json
+import time
+import statistics
+
+from app.db.connection import db_connection
+
+SCHEMA = 'medimind_bench'
+
+BASE = """
+    FROM appointments a
+    JOIN doctors d ON a.doctor_id = d.id
+    WHERE a.doctor_id = %s
+"""
+ORDER = "ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC"
+
+
+def seed(cur, rows, doctors=200):
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(f"SET search_path TO {SCHEMA}")
+    cur.execute("""
+        CREATE TABLE doctors (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            specialization TEXT NOT NULL,
+            is_verified BOOLEAN DEFAULT TRUE
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE appointments (
+            id SERIAL PRIMARY KEY,
+            patient_name TEXT NOT NULL,
+            patient_email TEXT NOT NULL,
+            patient_phone TEXT DEFAULT '',
+            doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+            appointment_date DATE NOT NULL,
+            appointment_time TIME NOT NULL,
+            reason TEXT DEFAULT '',
+            status TEXT NOT NULL DEFAULT 'pending',
+            notes TEXT DEFAULT '',
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    cur.execute("""
+        INSERT INTO doctors (name, specialization)
+        SELECT 'Doctor ' || g, (ARRAY['Cardiology','Dermatology','Neurology','Pediatrics'])[1 + g %% 4]
+        FROM generate_series(1, %s) g
+    """, (doctors,))
+    cur.execute("""
+        INSERT INTO appointments (patient_name, patient_email, doctor_id, appointment_date,
+                                  appointment_time, status)
+        SELECT 'Patient ' || g, 'p' || g || '@example.com', 1 + g %% %s,
+               DATE '2020-01-01' + (g / 40) %% 3000,
+               TIME '08:00' + ((g %% 40) * INTERVAL '15 minutes'),
+               (ARRAY['pending','confirmed','completed','cancelled'])[1 + g %% 4]
+        FROM generate_series(1, %s) g
+    """, (doctors, rows))
+    cur.execute("CREATE INDEX ON appointments(appointment_date DESC, appointment_time DESC, id DESC)")
+    cur.execute("CREATE INDEX ON appointments(doctor_id, appointment_date DESC, appointment_time DESC, id DESC)")
+    cur.execute("CREATE INDEX ON appointments(status, appointment_date DESC, appointment_time DESC, id DESC)")
+    cur.execute("ANALYZE doctors")
+    cur.execute("ANALYZE appointments")
+
+
+def timed(cur, query, params, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cur.execute(query, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return round(statistics.median(samples), 3)
+
+
+def main(rows=2_000_000, per_page=20):
+    results = {"benchmark": "appointments_pagination", "rows": rows, "per_page": per_page, "pages": []}
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            start = time.perf_counter()
+            seed(cur, rows)
+            conn.commit()
+            results["seed_s"] = round(time.perf_counter() - start, 1)
+
+            doctor_id = 1
+            cur.execute(f"SELECT COUNT(*) AS count {BASE}", (doctor_id,))
+            doctor_rows = cur.fetchone()['count']
+            results["doctor_rows"] = doctor_rows
+            results["exact_count_ms"] = timed(cur, f"SELECT COUNT(*) AS count {BASE}", (doctor_id,))
+            results["estimate_count_ms"] = timed(cur, f"EXPLAIN (FORMAT JSON) SELECT 1 {BASE}", (doctor_id,))
+
+            for depth in (1, 10, 100, 250, doctor_rows // per_page - 1):
+                offset = (depth - 1) * per_page
+                if offset < 0 or offset >= doctor_rows:
+                    continue
+                offset_ms = timed(cur, f"""
+                    SELECT a.*, d.name AS doctor_name, d.specialization {BASE}
+                    {ORDER} LIMIT %s OFFSET %s
+                """, (doctor_id, per_page, offset))
+
+                # Cursor for the same page: the last row of the previous page
+                keyset_ms = None
+                if offset:
+                    cur.execute(f"SELECT a.appointment_date, a.appointment_time, a.id {BASE} {ORDER} LIMIT 1 OFFSET %s",
+                                (doctor_id, offset - 1))
+                    last = cur.fetchone()
+                    keyset_ms = timed(cur, f"""
+                        SELECT a.*, d.name AS doctor_name, d.specialization {BASE}
+                        AND (a.appointment_date, a.appointment_time, a.id) < (%s, %s, %s)
+                        {ORDER} LIMIT %s
+                    """, (doctor_id, last['appointment_date'], last['appointment_time'], last['id'], per_page + 1))
+                else:
+                    keyset_ms = timed(cur, f"""
+                        SELECT a.*, d.name AS doctor_name, d.specialization {BASE}
+                        {ORDER} LIMIT %s
+                    """, (doctor_id, per_page + 1))
+
+                results["pages"].append({"page": depth, "offset_ms": offset_ms, "keyset_ms": keyset_ms})
+
+            if os.environ.get('BENCH_KEEP_SCHEMA') != '1':
+                cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+            conn.commit()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
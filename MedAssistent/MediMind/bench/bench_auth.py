@@ -0,0 +1,127 @@
+"""Benchmark: doctor login throughput with hashing in the request threads vs
+in the hashing process pool, and what a login burst does to unrelated
+requests in the same worker.
+
+Runs the Flask app in-process against the configured database (PG*
+environment variables). A temporary doctor is created and deleted
+afterwards. For each configuration, `clients` threads log in back to back
+for `seconds` while a probe thread measures /api/doctors latency (a cached,
+CPU-light endpoint). Run from the MediMind directory:
+
+    python -m bench.bench_auth [clients] [seconds]
+
+PASSWORD_HASH_METHOD selects the hash parameters, as in the app.
+"""
+import os
+import sys
+import json
+import time
+import threading
+
+from app import create_app
+from app.db.connection import db_connection
+from app.services import auth
+from app.services.auth import PasswordHasher
+
+EMAIL = 'bench-auth@example.com'
+PASSWORD = 'bench-password-123'
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(app, hasher, clients, seconds):
+    auth._hasher = hasher
+    # Warm up: starts the pool's processes outside the measured window
+    hasher.hash_password('warm-up')
+
+    stop = threading.Event()
+    logins = [0] * clients
+    busy = [0] * clients
+    probe_ms = []
+
+    def login(i):
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/api/doctor/login', json={"email": EMAIL, "password": PASSWORD})
+            if response.status_code == 200:
+                logins[i] += 1
+            elif response.status_code == 503:
+                busy[i] += 1
+            else:
+                raise RuntimeError(f"login returned {response.status_code}")
+
+    def probe():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/api/doctors')
+            probe_ms.append((time.perf_counter() - started) * 1000.0)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login, args=(i,)) for i in range(clients)]
+    threads.append(threading.Thread(target=probe))
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    # Cores the hashing can use: the pool's processes, or the client threads
+    # when hashing inline (hashlib releases the GIL while it hashes)
+    cores = min(os.cpu_count() or 1, hasher.workers if hasher.workers > 0 else clients)
+    hasher.shutdown()
+    return {
+        "workers": hasher.workers,
+        "logins_per_s": round(sum(logins) / elapsed, 1),
+        "logins_per_s_per_core": round(sum(logins) / elapsed / cores, 1),
+        "rejected_503": sum(busy),
+        "web_process_cpu_s": round(time.process_time() - cpu_start, 2),
+        "probe_p50_ms": round(percentile(probe_ms, 0.5), 2),
+        "probe_p99_ms": round(percentile(probe_ms, 0.99), 2),
+    }
+
+
+def main(clients=8, seconds=5.0):
+    app = create_app()
+    method = os.environ.get('PASSWORD_HASH_METHOD', auth.DEFAULT_HASH_METHOD)
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO doctors (name, email, password_hash, specialization, license_number, is_verified)
+                VALUES ('Bench Doctor', %s, %s, 'General Medicine', 'BENCH-AUTH', TRUE)
+                ON CONFLICT (email) DO UPDATE SET password_hash = EXCLUDED.password_hash
+                RETURNING id
+            """, (EMAIL, auth._hash(PASSWORD, method)))
+            doctor_id = cur.fetchone()['id']
+        conn.commit()
+
+    cpus = os.cpu_count() or 1
+    results = {"benchmark": "auth", "method": method, "clients": clients, "seconds": seconds,
+               "cpus": cpus, "runs": {}}
+    try:
+        results["runs"]["inline"] = run(app, PasswordHasher(method, workers=0, max_pending=clients),
+                                        clients, seconds)
+        for workers in sorted({1, max(1, cpus // 2), cpus}):
+            results["runs"][f"pool_{workers}"] = run(
+                app, PasswordHasher(method, workers=workers, max_pending=clients), clients, seconds)
+    finally:
+        auth._hasher = None
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM doctors WHERE id = %s", (doctor_id,))
+            conn.commit()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 5.0)
@@ -0,0 +1,91 @@
+"""Benchmark: one /api/book call per appointment vs /api/book/bulk and
+/api/appointments/bulk-status.
+
+Runs the Flask app in-process against the configured database (PG*
+environment variables). A temporary verified doctor is created, its
+appointments are booked and confirmed both ways, and everything is deleted
+afterwards. Run from the MediMind directory:
+
+    python -m bench.bench_bulk_appointments [items]
+"""
+import sys
+import json
+import time
+from datetime import date, timedelta
+
+from app import create_app
+from app.db.connection import db_connection
+from app.services.tokens import get_token_service
+
+
+def bookings(doctor_id, count, start_day):
+    """count distinct 30-minute slots between 08:00 and 18:00 from start_day on"""
+    items = []
+    for i in range(count):
+        day = start_day + timedelta(days=i // 20)
+        minutes = 8 * 60 + (i % 20) * 30
+        items.append({
+            "patient_name": f"Bench Patient {i}",
+            "patient_email": f"bench{i}@example.com",
+            "doctor_id": doctor_id,
+            "appointment_date": day.isoformat(),
+            "appointment_time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+        })
+    return items
+
+
+def main(count=1000):
+    app = create_app()
+    client = app.test_client()
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO doctors (name, email, password_hash, specialization, license_number, is_verified)
+                VALUES ('Bench Doctor', 'bench-bulk@example.com', '-', 'General Medicine', 'BENCH-BULK', TRUE)
+                ON CONFLICT (email) DO UPDATE SET is_verified = TRUE
+                RETURNING id
+            """)
+            doctor_id = cur.fetchone()['id']
+        conn.commit()
+
+    # Status changes are doctor actions and need the doctor's access token
+    auth = {"Authorization": f"Bearer {get_token_service().issue(doctor_id)['access_token']}"}
+
+    results = {"benchmark": "bulk_appointments", "items": count}
+    try:
+        # Far-future, non-overlapping date ranges for the two runs
+        single_items = bookings(doctor_id, count, date.today() + timedelta(days=3650))
+        bulk_items = bookings(doctor_id, count, date.today() + timedelta(days=3650 + count // 20 + 1))
+
+        start = time.perf_counter()
+        single_ids = [client.post('/api/book', json=item).get_json()['appointment_id'] for item in single_items]
+        results["single_book_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+
+        start = time.perf_counter()
+        response = client.post('/api/book/bulk', json={"appointments": bulk_items}).get_json()
+        results["bulk_book_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+        results["bulk_book_summary"] = response["summary"]
+        bulk_ids = [r["appointment_id"] for r in response["results"] if r["result"] == "created"]
+
+        start = time.perf_counter()
+        for appointment_id in single_ids:
+            client.post(f'/api/appointments/{appointment_id}/confirm', json={}, headers=auth)
+        results["single_status_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+
+        start = time.perf_counter()
+        response = client.post('/api/appointments/bulk-status', json={"updates": [
+            {"appointment_id": appointment_id, "status": "confirmed"} for appointment_id in bulk_ids
+        ]}, headers=auth).get_json()
+        results["bulk_status_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+        results["bulk_status_summary"] = response["summary"]
+    finally:
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM doctors WHERE id = %s", (doctor_id,))
+            conn.commit()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
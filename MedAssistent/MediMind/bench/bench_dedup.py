@@ -0,0 +1,79 @@
+"""Benchmark: near-duplicate clustering on synthetic syndicated articles.
+
+Run from the MediMind directory:
+
+    python -m bench.bench_dedup [articles] [dup_rate]
+
+Originals are random sentences over a medical-news vocabulary; syndicated
+copies re-publish an original under a new URL with small edits (title
+suffix, a changed word). Reports clustering time and how many copies were
+removed versus how many originals were wrongly merged.
+"""
+import sys
+import json
+import time
+import random
+
+from app.services.dedup import dedupe_articles
+
+VOCABULARY = (
+    "patients doctors hospital clinical trial treatment therapy study research disease diagnosis "
+    "prevention vaccine health public officials report results data risk adults children women men "
+    "cancer heart diabetes asthma influenza virus infection care drug approval agency new early "
+    "symptoms season cases rise fall program funding community nurses surgery outcomes cohort "
+    "sleep diet exercise weight blood pressure memory brain lung kidney liver screening genetic"
+).split()
+
+
+def make_batch(count, dup_rate, seed=11):
+    rng = random.Random(seed)
+    articles, originals = [], []
+    for i in range(count):
+        if originals and rng.random() < dup_rate:
+            base = rng.choice(originals)
+            words = base['description'].split()
+            words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+            articles.append(dict(base,
+                                 url=f"https://mirror{rng.randrange(5)}.example.com/{i}",
+                                 title=base['title'] + rng.choice(['', ' - report', ' | Health']),
+                                 description=' '.join(words),
+                                 original=base['url']))
+        else:
+            article = {
+                "title": ' '.join(rng.choice(VOCABULARY) for _ in range(8)).capitalize(),
+                "description": ' '.join(rng.choice(VOCABULARY) for _ in range(35)) + '.',
+                "url": f"https://news.example.com/{i}",
+                "urlToImage": None,
+                "author": rng.choice([None, "Staff Reporter"]),
+                "publishedAt": f"2026-01-{1 + i % 28:02d}T00:00:00Z",
+            }
+            article['original'] = article['url']
+            originals.append(article)
+            articles.append(article)
+    return articles, len(originals)
+
+
+def main(count=3000, dup_rate=0.3):
+    articles, originals = make_batch(count, dup_rate)
+
+    start = time.perf_counter()
+    kept = dedupe_articles(articles)
+    elapsed = time.perf_counter() - start
+
+    stories_kept = len({a['original'] for a in kept})
+    print(json.dumps({
+        "benchmark": "news_near_duplicates",
+        "articles": count,
+        "originals": originals,
+        "syndicated_copies": count - originals,
+        "kept": len(kept),
+        "copies_missed": len(kept) - stories_kept,
+        "stories_wrongly_merged": originals - stories_kept,
+        "ms": round(elapsed * 1000.0, 1),
+        "us_per_article": round(elapsed / count * 1e6, 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.3)
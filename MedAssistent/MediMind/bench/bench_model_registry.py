@@ -0,0 +1,42 @@
+"""Micro-benchmark: per-request model setup cost before/after the registry.
+
+Run from the MediMind directory:
+
+    python -m bench.bench_model_registry [iterations]
+
+Uses whichever backend CHAT_MODEL_BACKEND selects; with the Gemini backend
+this measures genai.GenerativeModel construction (no network calls are made).
+"""
+import sys
+import time
+import json
+
+from app.routes.chatbot import MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG
+from app.services.llm import create_model, ModelRegistry
+
+
+def _time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations=10000):
+    registry = ModelRegistry()
+    registry.get(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG)
+
+    before = _time_per_call(lambda: create_model(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG), iterations)
+    after = _time_per_call(lambda: registry.get(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG), iterations)
+
+    print(json.dumps({
+        "benchmark": "model_setup_per_request",
+        "iterations": iterations,
+        "rebuild_us": round(before, 2),
+        "registry_us": round(after, 2),
+        "speedup": round(before / after, 1) if after else None,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
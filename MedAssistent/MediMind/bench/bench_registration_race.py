@@ -0,0 +1,118 @@
+"""Concurrency check: parallel duplicate doctor registrations and bookings.
+
+Fires `clients` simultaneous /api/doctor/register calls that share one
+email (and, in a second round, one license number), then `clients`
+simultaneous /api/book calls for one slot. Exactly one of each round must
+succeed and every other call must get the specific 409 message; any 500 or
+second success fails the run. Runs the Flask app in-process against the
+configured database (PG* environment variables) and deletes its rows
+afterwards. Run from the MediMind directory:
+
+    python -m bench.bench_registration_race [clients]
+
+Hashing uses cheap pbkdf2 parameters unless PASSWORD_HASH_METHOD is set,
+so the requests reach the database close together.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+from app import create_app
+from app.db.connection import db_connection
+
+PREFIX = 'bench-race'
+
+
+def fire(app, path, bodies):
+    """POST all bodies at once from separate threads; [(status, json)] and wall time"""
+    barrier = threading.Barrier(len(bodies))
+    results = [None] * len(bodies)
+
+    def call(i):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post(path, json=bodies[i])
+        results[i] = (response.status_code, response.get_json())
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(bodies))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def check(name, results, success_code, conflict_message):
+    outcomes = Counter()
+    for status, body in results:
+        if status == success_code:
+            outcomes["created"] += 1
+        elif status == 409 and body.get("error") == conflict_message:
+            outcomes["conflict"] += 1
+        else:
+            outcomes[f"unexpected_{status}"] += 1
+    ok = outcomes["created"] == 1 and outcomes["conflict"] == len(results) - 1
+    return {"round": name, "ok": ok, **outcomes}
+
+
+def registration(i, email, license_number):
+    return {"name": f"Race Doctor {i}", "email": email, "password": "race-password-1",
+            "specialization": "General Medicine", "license_number": license_number}
+
+
+def cleanup():
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM doctors WHERE email LIKE %s", (f"{PREFIX}%",))
+        conn.commit()
+
+
+def main(clients=32):
+    # Every caller must reach the database, not bounce off the hashing queue
+    os.environ.setdefault('AUTH_HASH_MAX_QUEUE', str(clients))
+    app = create_app()
+    cleanup()
+
+    rounds = []
+    try:
+        results, elapsed = fire(app, '/api/doctor/register', [
+            registration(i, f"{PREFIX}-same@example.com", f"{PREFIX}-lic-{i}") for i in range(clients)
+        ])
+        rounds.append({**check("same_email", results, 200, "Email already registered"),
+                       "ms": round(elapsed * 1000.0, 1)})
+
+        results, elapsed = fire(app, '/api/doctor/register', [
+            registration(i, f"{PREFIX}-{i}@example.com", f"{PREFIX}-same-lic") for i in range(clients)
+        ])
+        rounds.append({**check("same_license", results, 200, "License number already registered"),
+                       "ms": round(elapsed * 1000.0, 1)})
+
+        # Book one slot of the first registered doctor from every client at once
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE doctors SET is_verified = TRUE WHERE email = %s RETURNING id",
+                            (f"{PREFIX}-same@example.com",))
+                doctor_id = cur.fetchone()['id']
+            conn.commit()
+        results, elapsed = fire(app, '/api/book', [
+            {"patient_name": f"Race Patient {i}", "patient_email": f"race{i}@example.com",
+             "doctor_id": doctor_id, "appointment_date": "2035-01-08", "appointment_time": "09:00"}
+            for i in range(clients)
+        ])
+        rounds.append({**check("same_slot", results, 201, "This time slot is already booked"),
+                       "ms": round(elapsed * 1000.0, 1)})
+    finally:
+        cleanup()
+
+    print(json.dumps({"benchmark": "registration_race", "clients": clients, "rounds": rounds}, indent=2))
+    return 0 if all(r["ok"] for r in rounds) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 32))
@@ -0,0 +1,76 @@
+"""Benchmark: compiled relevance scorer vs the per-keyword substring scan.
+
+Run from the MediMind directory:
+
+    python -m bench.bench_relevance [articles] [extra_keywords]
+
+extra_keywords pads both keyword lists with synthetic terms to show how
+each approach scales as keywords are added.
+"""
+import sys
+import json
+import time
+
+from bench.fake_newsapi import make_articles
+from app.services.relevance import RelevanceScorer, MEDICAL_KEYWORD_WEIGHTS, IRREGULAR_FORMS
+
+# The boolean filter used before the scorer
+LEGACY_KEYWORDS = [
+    'medical', 'health', 'clinical', 'research', 'study', 'treatment',
+    'medicine', 'healthcare', 'patient', 'doctor', 'hospital', 'therapy',
+    'drug', 'pharmaceutical', 'disease', 'diagnosis', 'prevention'
+]
+
+
+def legacy_filter(articles, keywords):
+    kept = 0
+    for article in articles:
+        title_lower = article['title'].lower()
+        desc_lower = article['description'].lower()
+        if any(keyword in title_lower or keyword in desc_lower for keyword in keywords):
+            kept += 1
+    return kept
+
+
+def scorer_filter(articles, scorer):
+    return sum(1 for a in articles if scorer.is_relevant(a['title'], a['description']))
+
+
+def _best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(count=5000, extra_keywords=0):
+    articles = make_articles(count, seed=7)
+    padding = [f"synthterm{i}" for i in range(extra_keywords)]
+    keywords = LEGACY_KEYWORDS + padding
+    weights = dict(MEDICAL_KEYWORD_WEIGHTS, **{k: 1.0 for k in padding})
+
+    build_start = time.perf_counter()
+    scorer = RelevanceScorer(weights, IRREGULAR_FORMS)
+    build_ms = (time.perf_counter() - build_start) * 1000.0
+
+    legacy_s, legacy_kept = _best_of(lambda: legacy_filter(articles, keywords))
+    scorer_s, scorer_kept = _best_of(lambda: scorer_filter(articles, scorer))
+
+    print(json.dumps({
+        "benchmark": "news_relevance",
+        "articles": count,
+        "keywords": len(keywords),
+        "legacy_ms": round(legacy_s * 1000.0, 2),
+        "legacy_kept": legacy_kept,
+        "scorer_ms": round(scorer_s * 1000.0, 2),
+        "scorer_kept": scorer_kept,
+        "scorer_build_ms": round(build_ms, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,138 @@
+"""Local HTTP stand-in for NewsAPI.
+
+Serves /v2/top-headlines, /v2/everything and /v2/sources with synthetic
+articles, including syndicated near-duplicates under different URLs, and a
+tunable per-endpoint latency. Point the app at it with
+
+    python -m bench.fake_newsapi --port 8089 --latency 0.2
+    NEWS_API_BASE_URL=http://127.0.0.1:8089/v2 NEWS_API_KEY=test python main.py
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+TOPICS = [
+    ("New clinical trial shows promise for {c} treatment",
+     "Researchers report that a phase {n} clinical trial of a new therapy for {c} reduced symptoms in patients "
+     "compared with standard care, according to results published this week."),
+    ("Hospitals see rise in {c} cases this season",
+     "Doctors at several hospitals say {c} admissions have increased, and public health officials are urging "
+     "prevention measures such as vaccination and early diagnosis."),
+    ("Study links sleep quality to {c} risk",
+     "A large observational study of {n}000 adults found that poor sleep was associated with higher risk of {c}, "
+     "suggesting new directions for prevention research."),
+    ("Local team wins {s} championship",
+     "The hometown team celebrated a dramatic win in the {s} final on Sunday night in front of {n}0000 fans."),
+]
+CONDITIONS = ['diabetes', 'asthma', 'influenza', 'migraine', 'hypertension', 'arthritis', 'measles', 'dementia']
+SPORTS = ['basketball', 'football', 'hockey']
+SOURCES = ['Health Wire', 'Medical Daily', 'Science Post', 'City Herald', 'Global News']
+
+
+def make_articles(count, seed=0, dup_rate=0.3):
+    """Synthetic articles; about dup_rate of them re-publish an earlier story under a new URL"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    articles = []
+    for i in range(count):
+        if articles and rng.random() < dup_rate:
+            original = rng.choice(articles)
+            article = dict(original)
+            article['url'] = f"https://{rng.choice(SOURCES).lower().replace(' ', '')}.example.com/syndicated/{seed}-{i}"
+            article['source'] = {"name": rng.choice(SOURCES)}
+            article['title'] = original['title'] + rng.choice(['', ' - report', ' | Health'])
+        else:
+            title, desc = rng.choice(TOPICS)
+            condition = rng.choice(CONDITIONS)
+            sport = rng.choice(SPORTS)
+            article = {
+                "source": {"name": rng.choice(SOURCES)},
+                "author": rng.choice([None, "Staff Reporter", "A. Writer"]),
+                "title": title.format(c=condition.title(), s=sport),
+                "description": desc.format(c=condition, s=sport, n=rng.randint(1, 3)),
+                "url": f"https://news.example.com/{seed}/{i}",
+                "urlToImage": None,
+                "content": None,
+            }
+        article['publishedAt'] = (now - timedelta(minutes=rng.randint(0, 7 * 24 * 60))).strftime('%Y-%m-%dT%H:%M:%SZ')
+        articles.append(article)
+    return articles
+
+
+class FakeNewsAPIHandler(BaseHTTPRequestHandler):
+    latency = {}
+    default_latency = 0.0
+    requests_served = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        type(self).requests_served += 1
+        time.sleep(self.latency.get(endpoint, self.default_latency))
+
+        if not params.get('apiKey'):
+            return self._send(401, {"status": "error", "code": "apiKeyMissing"})
+
+        page_size = min(int(params.get('pageSize', 20)), 100)
+        if endpoint == 'top-headlines':
+            articles = make_articles(page_size, seed=1)
+        elif endpoint == 'everything':
+            articles = make_articles(page_size, seed=2)
+        elif endpoint == 'sources':
+            return self._send(200, {"status": "ok", "sources": [
+                {"id": name.lower().replace(' ', '-'), "name": name, "category": "health", "language": "en"}
+                for name in SOURCES
+            ]})
+        else:
+            return self._send(404, {"status": "error", "code": "notFound"})
+        self._send(200, {"status": "ok", "totalResults": len(articles), "articles": articles})
+
+
+def start_fake_newsapi(port=0, latency=0.0, endpoint_latency=None):
+    """Start the stand-in on a background thread; returns (server, base_url)"""
+    handler = type('Handler', (FakeNewsAPIHandler,), {
+        'default_latency': latency,
+        'latency': dict(endpoint_latency or {}),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--endpoint-latency', action='append', default=[], metavar='NAME=SECONDS',
+                        help='per-endpoint latency, e.g. everything=3')
+    args = parser.parse_args(argv)
+    endpoint_latency = {k: float(v) for k, v in (item.split('=', 1) for item in args.endpoint_latency)}
+    server, base_url = start_fake_newsapi(args.port, args.latency, endpoint_latency)
+    print(f"Fake NewsAPI listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""Load test: mixed concurrent workload against the MediMind API.
+
+Seeds a dedicated benchmark database (BENCH_PGDATABASE, default
+medimind_bench, created next to the configured PG* database) with synthetic
+doctors, availability, appointments and chat history; stubs Gemini with
+the fake backend and NewsAPI with bench/fake_newsapi.py; serves the app
+over HTTP; then drives a weighted mix of requests from concurrent clients
+and prints per-endpoint throughput and latency percentiles as JSON.
+
+Run from the MediMind directory:
+
+    python -m bench.load_test --duration 30 --concurrency 32
+    python -m bench.load_test --server gunicorn --workers 4 --output results.json
+    python -m bench.load_test --mix doctors=1,appointments=1 --llm-latency 0
+
+Compare runs across commits by diffing the JSON output ("commit" records
+the checked-out revision).
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from datetime import date, timedelta
+
+import requests
+import psycopg2
+
+from bench.fake_newsapi import start_fake_newsapi
+
+DEFAULT_MIX = {
+    'chat': 10,
+    'book': 5,
+    'appointments': 25,
+    'doctors': 25,
+    'slots': 15,
+    'news': 20,
+}
+SPECIALIZATIONS = ['Cardiology', 'Dermatology', 'Neurology', 'Pediatrics', 'General Medicine', 'Orthopedics']
+QUESTIONS = [
+    "What are common symptoms of the flu?",
+    "How much water should I drink a day?",
+    "Is it normal to feel tired after a vaccine?",
+    "What can I do about a mild headache?",
+    "How do I lower my blood pressure naturally?",
+]
+
+# Responses that mean the server did its job (a taken slot is a valid outcome)
+EXPECTED_STATUSES = {200, 201, 304, 409}
+
+
+def _parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --------------------------- SEED ------------------------------------
+
+def ensure_database(name):
+    """Create the benchmark database if needed (connects to the configured one)"""
+    conn = psycopg2.connect(
+        dbname=os.environ.get('PGDATABASE', 'dhp2024'),
+        user=os.environ.get('PGUSER', 'postgres'),
+        password=os.environ.get('PGPASSWORD', 'Ajay@123'),
+        host=os.environ.get('PGHOST', 'localhost'),
+        port=os.environ.get('PGPORT', '5432'),
+    )
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+            if not cur.fetchone():
+                cur.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        conn.close()
+
+
+def seed(doctors, appointments, chat_rows):
+    """Replace all rows with a synthetic data set; returns (doctor_ids, session_ids)"""
+    from app.db.migrate import migrate
+    from app.db.connection import db_connection
+
+    migrate()
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE appointment_status_history, appointments, doctor_availability, "
+                        "doctors, chat_history RESTART IDENTITY CASCADE")
+            cur.execute("""
+                INSERT INTO doctors (name, email, password_hash, specialization, license_number,
+                                     experience_years, consultation_fee, is_verified)
+                SELECT 'Dr. Bench ' || g, 'doctor' || g || '@bench.example.com', '-',
+                       (%s::text[])[1 + g %% %s], 'BENCH-' || g, g %% 30, 50 + g %% 100, TRUE
+                FROM generate_series(1, %s) g
+            """, (SPECIALIZATIONS, len(SPECIALIZATIONS), doctors))
+            # Weekday office hours for every doctor
+            cur.execute("""
+                INSERT INTO doctor_availability (doctor_id, day_of_week, start_time, end_time)
+                SELECT d.id, dow, TIME '09:00', TIME '17:00'
+                FROM doctors d CROSS JOIN generate_series(1, 5) dow
+            """)
+            # Past appointments plus some upcoming ones; never two active in one slot
+            cur.execute("""
+                INSERT INTO appointments (patient_name, patient_email, doctor_id, appointment_date,
+                                          appointment_time, status)
+                SELECT 'Patient ' || g, 'patient' || g || '@example.com', 1 + g %% %s,
+                       CURRENT_DATE - 365 + (g / %s / 16),
+                       TIME '09:00' + ((g / %s) %% 16) * INTERVAL '30 minutes',
+                       (ARRAY['completed','completed','cancelled','confirmed','pending'])[1 + g %% 5]
+                FROM generate_series(0, %s - 1) g
+            """, (doctors, doctors, doctors, appointments))
+            cur.execute("""
+                INSERT INTO chat_history (session_id, user_message, bot_response, created_at)
+                SELECT 'bench-session-' || (g %% GREATEST(%s / 10, 1)),
+                       'Synthetic question ' || g, 'Synthetic answer ' || g,
+                       NOW() - (g || ' seconds')::interval
+                FROM generate_series(1, %s) g
+            """, (chat_rows, chat_rows))
+            cur.execute("ANALYZE")
+            cur.execute("SELECT id FROM doctors ORDER BY id")
+            doctor_ids = [row['id'] for row in cur.fetchall()]
+        conn.commit()
+    session_ids = [f"bench-session-{i}" for i in range(max(chat_rows // 10, 1))] if chat_rows else []
+    return doctor_ids, session_ids
+
+
+# --------------------------- SERVER ----------------------------------
+
+def start_inprocess(port, threads):
+    """Serve create_app() with werkzeug's threaded server on a background thread"""
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    server = make_server('127.0.0.1', port, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_gunicorn(port, workers, threads):
+    """Run serve.py (the production profile) as a subprocess"""
+    env = dict(os.environ, PORT=str(port), HOST='127.0.0.1', WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'))
+    process = subprocess.Popen([sys.executable, 'serve.py'], env=env)
+
+    def stop():
+        process.terminate()
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return stop
+
+
+def wait_until_up(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/metrics", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout:.0f}s")
+
+
+# --------------------------- WORKLOAD --------------------------------
+
+class Workload:
+    """Builds one random request per call, according to the endpoint mix"""
+
+    def __init__(self, mix, doctor_ids, session_ids, seed=0):
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.doctor_ids = doctor_ids
+        self.session_ids = session_ids
+        self.rng = random.Random(seed)
+        self.first_day = date.today() + timedelta(days=30)
+
+    def next(self):
+        name = self.rng.choices(self.names, self.weights)[0]
+        return name, getattr(self, f"_{name}")()
+
+    def _doctor(self):
+        return self.rng.choice(self.doctor_ids)
+
+    def _chat(self):
+        body = {"message": self.rng.choice(QUESTIONS)}
+        if self.session_ids and self.rng.random() < 0.7:
+            body["session_id"] = self.rng.choice(self.session_ids)
+        return 'POST', '/api/chat', {"json": body}
+
+    def _book(self):
+        day = self.first_day + timedelta(days=self.rng.randrange(365))
+        minutes = 9 * 60 + 30 * self.rng.randrange(16)
+        return 'POST', '/api/book', {"json": {
+            "patient_name": "Load Test",
+            "patient_email": "load@example.com",
+            "doctor_id": self._doctor(),
+            "appointment_date": day.isoformat(),
+            "appointment_time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+        }}
+
+    def _appointments(self):
+        params = {"doctor_id": self._doctor(), "per_page": 20}
+        if self.rng.random() < 0.5:
+            params["pagination"] = "cursor"
+        else:
+            params["page"] = 1 + self.rng.randrange(5)
+        return 'GET', '/api/appointments', {"params": params}
+
+    def _doctors(self):
+        params = {}
+        if self.rng.random() < 0.5:
+            params["specialization"] = self.rng.choice(SPECIALIZATIONS)
+        return 'GET', '/api/doctors', {"params": params}
+
+    def _slots(self):
+        return 'GET', '/api/slots', {"params": {"doctor_id": self._doctor()}}
+
+    def _news(self):
+        return 'GET', '/api/news', {"params": {"country": "us", "page_size": 20}}
+
+
+def run_client(base_url, workload, deadline, samples, lock):
+    session = requests.Session()
+    local = []
+    while time.monotonic() < deadline:
+        name, (method, path, kwargs) = workload.next()
+        start = time.perf_counter()
+        try:
+            status = session.request(method, base_url + path, timeout=60, **kwargs).status_code
+        except requests.RequestException:
+            status = None
+        local.append((name, status, time.perf_counter() - start))
+    with lock:
+        samples.extend(local)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    def stats(rows):
+        latencies = sorted(latency * 1000.0 for _, _, latency in rows)
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, status, _ in rows if status not in EXPECTED_STATUSES),
+            "rps": round(len(rows) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "p90_ms": round(percentile(latencies, 90), 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+            "max_ms": round(latencies[-1], 2) if latencies else None,
+            "statuses": statuses,
+        }
+
+    by_endpoint = {}
+    for row in samples:
+        by_endpoint.setdefault(row[0], []).append(row)
+    return {name: stats(rows) for name, rows in sorted(by_endpoint.items())}, stats(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of load (after warm-up)')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds of unrecorded load first')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX,
+                        help='endpoint weights, e.g. chat=1,doctors=3 (default: %(default)s)')
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--appointments', type=int, default=200_000)
+    parser.add_argument('--chat-rows', type=int, default=100_000)
+    parser.add_argument('--no-seed', action='store_true', help='reuse the data of a previous run')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='fake Gemini latency in seconds')
+    parser.add_argument('--news-latency', type=float, default=0.2, help='fake NewsAPI latency in seconds')
+    parser.add_argument('--server', choices=('inprocess', 'gunicorn'), default='inprocess')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=16, help='threads per gunicorn worker')
+    parser.add_argument('--seed', type=int, help='random seed for the request mix (default: random, reported)')
+    parser.add_argument('--output', help='write the JSON report here as well as to stdout')
+    args = parser.parse_args(argv)
+    if args.seed is None:
+        args.seed = random.randrange(1_000_000)
+
+    news_server, news_url = start_fake_newsapi(latency=args.news_latency)
+    database = os.environ.get('BENCH_PGDATABASE', 'medimind_bench')
+    ensure_database(database)
+    # Everything below (this process and the gunicorn subprocess) uses the fakes
+    os.environ.update({
+        'PGDATABASE': database,
+        'CHAT_MODEL_BACKEND': 'fake',
+        'CHAT_FAKE_LATENCY': str(args.llm_latency),
+        'NEWS_API_BASE_URL': news_url,
+        'NEWS_API_KEY': 'load-test',
+        'DB_POOL_MAX': os.environ.get('DB_POOL_MAX', str(max(10, args.threads))),
+    })
+
+    started = time.perf_counter()
+    if args.no_seed:
+        from app.db.connection import db_connection
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id FROM doctors ORDER BY id")
+                doctor_ids = [row['id'] for row in cur.fetchall()]
+                cur.execute("SELECT DISTINCT session_id FROM chat_history LIMIT 10000")
+                session_ids = [row['session_id'] for row in cur.fetchall()]
+    else:
+        doctor_ids, session_ids = seed(args.doctors, args.appointments, args.chat_rows)
+    seed_s = time.perf_counter() - started
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    if args.server == 'gunicorn':
+        from app.db.connection import close_pool
+        close_pool()
+        stop = start_gunicorn(port, args.workers, args.threads)
+    else:
+        stop = start_inprocess(port, args.threads)
+
+    try:
+        wait_until_up(base_url)
+        samples, lock = [], threading.Lock()
+        for phase_index, (phase, seconds) in enumerate((('warmup', args.warmup), ('measure', args.duration))):
+            if phase == 'measure':
+                samples = []
+            deadline = time.monotonic() + seconds
+            phase_start = time.perf_counter()
+            clients = [
+                threading.Thread(target=run_client, args=(
+                    base_url, Workload(args.mix, doctor_ids, session_ids, seed=f"{args.seed}-{phase_index}-{i}"),
+                    deadline, samples, lock))
+                for i in range(args.concurrency)
+            ]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - phase_start
+    finally:
+        stop()
+        news_server.shutdown()
+
+    endpoints, total = summarize(samples, elapsed)
+    report = {
+        "benchmark": "load_test",
+        "commit": _git_revision(),
+        "config": {
+            "server": args.server,
+            "workers": args.workers if args.server == 'gunicorn' else 1,
+            "threads": args.threads,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "seed": args.seed,
+            "doctors": len(doctor_ids),
+            "appointments": args.appointments,
+            "chat_rows": args.chat_rows,
+            "llm_latency_s": args.llm_latency,
+            "news_latency_s": args.news_latency,
+        },
+        "seed_s": round(seed_s, 1),
+        "total": total,
+        "endpoints": endpoints,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
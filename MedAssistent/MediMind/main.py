@@ -1,12 +1,17 @@
 import os
-import logging
 from app import create_app
+from app.logging_config import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Processes spawned for password hashing re-import this script as
+# __mp_main__; only the real entry point (python main.py, gunicorn main:app,
+# flask --app main) builds the app, so they never open a DB pool or migrate
+if __name__ != '__mp_main__':
+    # Configure logging (LOG_LEVEL, LOG_FORMAT)
+    configure_logging()
 
-# Create Flask app
-app = create_app()
+    # Create Flask app
+    app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Development server only; use `python serve.py` in production
+    app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,11 +1,16 @@
-import logging
 import os
 from app import create_app
+from app.logging_config import configure_logging
 
-# Enable debug logging
-logging.basicConfig(level=logging.DEBUG)
+# Processes spawned for password hashing re-import this script as
+# __mp_main__; only the real entry point (python main.py, gunicorn main:app,
+# flask --app main) builds the app, so they never open a DB pool or migrate
+if __name__ != '__mp_main__':
+    # Configure logging (LOG_LEVEL, LOG_FORMAT)
+    configure_logging()
 
-app = create_app()
+    app = create_app()
 
 if __name__ == '__main__':
+    # Development server only; use `python serve.py` in production
     app.run(host='0.0.0.0', port=5000, debug=True)
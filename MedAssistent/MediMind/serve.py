@@ -0,0 +1,128 @@
+"""Production entry point: create_app() under gunicorn.
+
+    python serve.py
+
+Configuration (environment):
+    HOST, PORT                   bind address (default 0.0.0.0:5000)
+    WEB_CONCURRENCY              worker processes (default 2 x CPUs + 1, at most 8)
+    GUNICORN_THREADS             threads per worker (default 8, gthread worker)
+    GUNICORN_TIMEOUT             seconds before a silent worker is killed (default 60)
+    GUNICORN_GRACEFUL_TIMEOUT    seconds workers get to drain on shutdown (default 30)
+    GUNICORN_MAX_REQUESTS        recycle workers after this many requests (default 0, never)
+    GUNICORN_PRELOAD             load the app once in the master and fork (default 1)
+    SSE_MAX_SUBSCRIBERS          open /api/appointments/events streams per worker
+                                 (default GUNICORN_THREADS / 4; each holds a thread)
+    CHAT_MAX_IN_FLIGHT           concurrent LLM calls per worker (default the rest of
+                                 GUNICORN_THREADS / 2; each holds a thread)
+    ACCESS_LOG                   1 to log every request (default off)
+    LOG_LEVEL, LOG_FORMAT        see app/logging_config.py
+
+Pending migrations are applied once by the master before workers start;
+workers themselves never migrate (DB_AUTO_MIGRATE=0).
+"""
+import os
+import logging
+import multiprocessing
+
+from gunicorn.app.base import BaseApplication
+
+from app.logging_config import configure_logging
+
+
+def _options():
+    cpus = multiprocessing.cpu_count()
+    return {
+        'bind': f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}",
+        'workers': int(os.environ.get('WEB_CONCURRENCY', min(cpus * 2 + 1, 8))),
+        'threads': int(os.environ.get('GUNICORN_THREADS', 8)),
+        'worker_class': 'gthread',
+        'timeout': int(os.environ.get('GUNICORN_TIMEOUT', 60)),
+        'graceful_timeout': int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30)),
+        'keepalive': 5,
+        'max_requests': int(os.environ.get('GUNICORN_MAX_REQUESTS', 0)),
+        'max_requests_jitter': int(os.environ.get('GUNICORN_MAX_REQUESTS', 0)) // 10,
+        'preload_app': os.environ.get('GUNICORN_PRELOAD', '1') == '1',
+        'accesslog': '-' if os.environ.get('ACCESS_LOG') == '1' else None,
+        'loglevel': os.environ.get('LOG_LEVEL', 'INFO').lower(),
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }
+
+
+def when_ready(server):
+    # With preload the master opened pool connections while loading the app;
+    # close them so forked workers never share a socket
+    from app.db.connection import close_pool
+    close_pool()
+
+
+def post_fork(server, worker):
+    configure_logging()
+
+    # Chat calls block their request thread for the whole LLM round trip and
+    # each open event stream holds one too; together they get at most half
+    # of the worker's threads so bookings and listings always have some left
+    # (raise GUNICORN_THREADS for more concurrent chats or live dashboards).
+    # The chat worker is created lazily, after this hook, so the environment
+    # default still applies to it
+    from app.services.appointment_events import appointment_events
+    threads = server.cfg.threads
+    if 'SSE_MAX_SUBSCRIBERS' not in os.environ:
+        appointment_events.max_subscribers = max(1, threads // 4)
+    if 'CHAT_MAX_IN_FLIGHT' not in os.environ:
+        os.environ['CHAT_MAX_IN_FLIGHT'] = str(max(1, threads // 2 - appointment_events.max_subscribers))
+    long_lived = appointment_events.max_subscribers + int(os.environ['CHAT_MAX_IN_FLIGHT'])
+    if long_lived >= threads:
+        logging.warning(f"SSE_MAX_SUBSCRIBERS + CHAT_MAX_IN_FLIGHT ({long_lived}) leave no threads of "
+                        f"GUNICORN_THREADS ({threads}) for other requests")
+
+    # Close event streams as soon as SIGTERM arrives rather than after the
+    # graceful timeout; the worker installs this handler after post_fork
+    from app.lifecycle import begin_shutdown
+    handle_exit = worker.handle_exit
+
+    def handle_exit_and_close_streams(sig, frame):
+        begin_shutdown()
+        handle_exit(sig, frame)
+
+    worker.handle_exit = handle_exit_and_close_streams
+
+
+def worker_exit(server, worker):
+    # gunicorn has stopped accepting and waited for in-flight requests;
+    # finish LLM calls, flush chat history and close the pool. The arbiter
+    # SIGKILLs the worker graceful_timeout seconds after SIGTERM, and the
+    # drain has already used part of that, so only the rest is available
+    from app.lifecycle import shutdown, remaining_grace
+    shutdown(timeout=remaining_grace(server.cfg.graceful_timeout))
+
+
+class MediMindServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import create_app
+        return create_app()
+
+
+def main():
+    configure_logging()
+    os.environ.setdefault('DB_AUTO_MIGRATE', '0')
+
+    from app.db.migrate import migrate
+    applied = migrate()
+    if applied:
+        logging.info(f"Applied migrations {applied}")
+
+    MediMindServer(_options()).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,29 @@
 const { useState, useEffect } = React;
 
+// Requests that must not carry the (possibly expired) access token
+const TOKENLESS_URLS = ['/api/doctor/login', '/api/doctor/token/refresh'];
+
 function App() {
     const [currentView, setCurrentView] = useState('home');
     const [doctorSession, setDoctorSession] = useState(null);
 
     // No longer needed - using SVG icons directly
 
+    const saveSession = (session) => {
+        if (session && session.access_token) {
+            localStorage.setItem('doctorSession', JSON.stringify(session));
+        } else {
+            localStorage.removeItem('doctorSession');
+        }
+        setDoctorSession(session);
+    };
+
     // Check for existing doctor session on app load
     useEffect(() => {
         const savedSession = localStorage.getItem('doctorSession');
         if (savedSession) {
             try {
-                const session = JSON.parse(savedSession);
-                setDoctorSession(session);
+                saveSession(JSON.parse(savedSession));
             } catch (error) {
                 console.error('Invalid doctor session data:', error);
                 localStorage.removeItem('doctorSession');
@@ -20,15 +31,57 @@ function App() {
         }
     }, []);
 
+    // Attach the current access token to every request except login/refresh
+    useEffect(() => {
+        const interceptor = axios.interceptors.request.use((config) => {
+            const session = JSON.parse(localStorage.getItem('doctorSession') || 'null');
+            if (session?.access_token && !TOKENLESS_URLS.includes(config.url) && !config.headers.Authorization) {
+                config.headers.Authorization = `Bearer ${session.access_token}`;
+            }
+            return config;
+        });
+        return () => axios.interceptors.request.eject(interceptor);
+    }, []);
+
+    // Access tokens are short-lived: on a 401, refresh once and retry
+    useEffect(() => {
+        const interceptor = axios.interceptors.response.use(null, async (error) => {
+            const original = error.config;
+            const session = JSON.parse(localStorage.getItem('doctorSession') || 'null');
+            if (error.response?.status !== 401 || !session?.refresh_token || original._retried
+                || TOKENLESS_URLS.includes(original.url)) {
+                return Promise.reject(error);
+            }
+            original._retried = true;
+            try {
+                const response = await axios.post('/api/doctor/token/refresh', {
+                    refresh_token: session.refresh_token
+                });
+                const { access_token, refresh_token } = response.data;
+                saveSession({ ...session, access_token, refresh_token });
+                original.headers['Authorization'] = `Bearer ${access_token}`;
+                return axios(original);
+            } catch (refreshError) {
+                saveSession(null);
+                setCurrentView('doctor-register');
+                return Promise.reject(error);
+            }
+        });
+        return () => axios.interceptors.response.eject(interceptor);
+    }, []);
+
     const handleDoctorLogin = (doctorData) => {
-        setDoctorSession(doctorData);
-        localStorage.setItem('doctorSession', JSON.stringify(doctorData));
+        saveSession(doctorData);
         setCurrentView('doctor-dashboard');
     };
 
     const handleDoctorLogout = () => {
-        setDoctorSession(null);
-        localStorage.removeItem('doctorSession');
+        if (doctorSession?.access_token) {
+            axios.post('/api/doctor/logout', { refresh_token: doctorSession.refresh_token }, {
+                headers: { Authorization: `Bearer ${doctorSession.access_token}` }
+            }).catch(() => {});
+        }
+        saveSession(null);
         setCurrentView('home');
     };
 
@@ -27,6 +27,45 @@ function DoctorDashboard({ doctor, onLogout }) {
         loadAppointments();
     }, []);
 
+    // Live updates instead of polling: reload when this doctor's appointments change
+    useEffect(() => {
+        let events = null;
+        let retryTimer = null;
+        let pollTimer = null;
+        let retryDelay = 5000;
+        let stopped = false;
+        const reload = () => loadAppointments();
+
+        const connect = () => {
+            events = new EventSource(`/api/appointments/events?doctor_id=${doctor.id}`);
+            // Events are not replayed, so `ready` (sent on every reconnect) means
+            // reload to pick up changes made while the stream was down
+            ['ready', 'booked', 'status_changed', 'updated', 'resync'].forEach(type => events.addEventListener(type, reload));
+            events.addEventListener('ready', () => {
+                retryDelay = 5000;
+                clearInterval(pollTimer);
+                pollTimer = null;
+            });
+            events.onerror = () => {
+                // EventSource reconnects dropped streams by itself but gives up on
+                // non-200 responses (503 when the server is at its stream limit):
+                // poll meanwhile and try again later
+                if (stopped || events.readyState !== EventSource.CLOSED) return;
+                if (!pollTimer) pollTimer = setInterval(reload, 30000);
+                retryTimer = setTimeout(connect, retryDelay + Math.random() * 1000);
+                retryDelay = Math.min(retryDelay * 2, 120000);
+            };
+        };
+
+        connect();
+        return () => {
+            stopped = true;
+            events.close();
+            clearTimeout(retryTimer);
+            clearInterval(pollTimer);
+        };
+    }, [doctor.id]);
+
     // Initialize Feather icons after component renders
     useEffect(() => {
         if (window.feather) {
@@ -65,9 +65,10 @@ function DoctorRegistration({ onLogin }) {
             setMessage('Login successful! Redirecting to dashboard...');
             setMessageType('success');
             
-            // Call the onLogin callback with doctor data
+            // Call the onLogin callback with doctor data and tokens
+            const { doctor, access_token, refresh_token } = response.data;
             setTimeout(() => {
-                onLogin(response.data.doctor);
+                onLogin({ ...doctor, access_token, refresh_token });
             }, 1000);
 
         } catch (error) {